@@ -1,6 +1,7 @@
 # CheersBot v2 - A Discord bot by Wubbity. Cheers!
 
 import os
+import copy
 import json
 import platform
 import asyncio
@@ -10,21 +11,24 @@ import discord
 import math
 import importlib.util
 import atexit
+import time
+from collections import Counter
 from discord.ext import commands, tasks
 from discord import app_commands, ui, ButtonStyle, Interaction
 from discord.ui import View, Button
 from discord.ext.commands import AutoShardedBot
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from discord import app_commands
 from dotenv import load_dotenv
 from datetime import datetime, timedelta, timezone
 import topgg  # Import topggpy for Top.gg API integration
+import storage
+import sounds as sound_lib
+import scheduling
 
 # Add logging setup
 import logging
 from logging.handlers import TimedRotatingFileHandler
 
-cheers_count_lock = asyncio.Lock()
 config_lock = asyncio.Lock()
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -84,15 +88,11 @@ FEEDBACK_VIEWS_PATH = os.path.join(SERVER_LOG_DIR, "FeedbackViews.json")
 
 # Load persistent feedback views
 def load_feedback_views():
-    if os.path.exists(FEEDBACK_VIEWS_PATH):
-        with open(FEEDBACK_VIEWS_PATH, 'r') as f:
-            return json.load(f)
-    return {}
+    return state_writer.read_json(FEEDBACK_VIEWS_PATH, {})
 
 # Save persistent feedback views
 def save_feedback_views(feedback_views):
-    with open(FEEDBACK_VIEWS_PATH, 'w') as f:
-        json.dump(feedback_views, f, indent=4)
+    state_writer.write_json(FEEDBACK_VIEWS_PATH, feedback_views)
 
 # Global dictionary to hold active views
 persistent_views = {}
@@ -101,40 +101,66 @@ persistent_views = {}
 FEEDBACK_BANS_PATH = os.path.join(SERVER_LOG_DIR, "FeedbackBans.json")
 
 def load_feedback_bans():
-    if os.path.exists(FEEDBACK_BANS_PATH):
-        with open(FEEDBACK_BANS_PATH, 'r') as f:
-            return json.load(f)
-    return {}
+    return state_writer.read_json(FEEDBACK_BANS_PATH, {})
 
 def save_feedback_bans(feedback_bans):
-    with open(FEEDBACK_BANS_PATH, 'w') as f:
-        json.dump(feedback_bans, f, indent=4)
+    state_writer.write_json(FEEDBACK_BANS_PATH, feedback_bans)
 
 # Path to store blacklisted servers
 BLACKLISTED_SERVERS_PATH = os.path.join(SERVER_LOG_DIR, "BlacklistedServers.json")
 
 def load_blacklisted_servers():
-    if os.path.exists(BLACKLISTED_SERVERS_PATH):
-        with open(BLACKLISTED_SERVERS_PATH, 'r') as f:
-            return json.load(f)
-    return []
+    return state_writer.read_json(BLACKLISTED_SERVERS_PATH, [])
 
 def save_blacklisted_servers(blacklisted_servers):
-    with open(BLACKLISTED_SERVERS_PATH, 'w') as f:
-        json.dump(blacklisted_servers, f, indent=4)
+    state_writer.write_json(BLACKLISTED_SERVERS_PATH, blacklisted_servers)
+
+class ServerBlacklist:
+    """In-memory index of BlacklistedServers.json so lookups never touch disk."""
+
+    def __init__(self):
+        self.guild_ids = set()
+        self.reasons = {}
+
+    def load(self):
+        blacklisted_servers = load_blacklisted_servers()
+        self.guild_ids = {int(server['id']) for server in blacklisted_servers}
+        self.reasons = {server['id']: server.get('reason', "No reason provided.") for server in blacklisted_servers}
+
+    def __contains__(self, guild_id):
+        return int(guild_id) in self.guild_ids
+
+    def __len__(self):
+        return len(self.guild_ids)
+
+    def reason(self, guild_id):
+        return self.reasons.get(str(guild_id), "No reason provided.")
+
+    def entries(self):
+        return [{"id": server_id, "reason": reason} for server_id, reason in self.reasons.items()]
+
+    def add(self, guild_id, reason):
+        self.guild_ids.add(int(guild_id))
+        self.reasons[str(guild_id)] = reason
+        save_blacklisted_servers(self.entries())
+
+    def remove(self, guild_id):
+        if int(guild_id) not in self.guild_ids:
+            return False
+        self.guild_ids.discard(int(guild_id))
+        self.reasons.pop(str(guild_id), None)
+        save_blacklisted_servers(self.entries())
+        return True
+
+blacklist_index = ServerBlacklist()
 
 def is_server_blacklisted(guild_id):
-    blacklisted_servers = load_blacklisted_servers()
-    return any(server['id'] == str(guild_id) for server in blacklisted_servers)
+    return guild_id in blacklist_index
 
 async def handle_blacklisted_server(interaction):
-    blacklisted_servers = load_blacklisted_servers()
-    server_info = next((server for server in blacklisted_servers if server['id'] == str(interaction.guild.id)), None)
-    reason = server_info['reason'] if server_info else "No reason provided."
+    reason = blacklist_index.reason(interaction.guild.id)
     
-    with open(config_path, 'r') as f:
-        global_config = json.load(f)
-    developer_id = global_config.get("bot_developer_ids", [])[0]
+    developer_id = bot.global_config.primary_developer_id
 
     embed = discord.Embed(
         title="Server Blacklisted",
@@ -143,11 +169,9 @@ async def handle_blacklisted_server(interaction):
     )
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
-# Load developer IDs from config.json
+# Developer IDs from config.json
 def load_developer_ids():
-    with open(config_path, 'r') as f:
-        global_config = json.load(f)
-    return global_config.get("bot_developer_ids", [])
+    return bot.global_config.developer_ids
 
 # Update ffmpeg path for Windows and Linux
 if current_os == "Windows":
@@ -160,23 +184,55 @@ else:
 logging.info(f"Sound folder path: {SOUND_FOLDER}")
 logging.info(f"FFmpeg path: {ffmpeg_path}")
 
+opus_cache = sound_lib.OpusCache(os.path.join(BASE_DIR, "opus_cache"), SOUND_FOLDER, ffmpeg_path)
+sound_catalog = sound_lib.SoundCatalog(SOUND_FOLDER, ffmpeg_path, opus_cache)
+sound_catalog.refresh()
+
 # Helper Functions for Configurations
-def get_config_filepath(guild_id):
-    return os.path.join(CONFIG_DIR, f'config_{guild_id}.json')
+# In-memory cache of per-guild configs: guild ID -> (config dict, storage version)
+server_config_cache = {}
+config_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+def write_config(guild_id, config_data):
+    # Memory is authoritative right away; the storage write is coalesced by the state writer
+    key = ("config", str(guild_id))
+    cached = server_config_cache.get(str(guild_id))
+    server_config_cache[str(guild_id)] = (config_data, cached[1] if cached else None)
+
+    def write(snapshot):
+        config_storage.save(guild_id, snapshot)
+        return config_storage.version(guild_id)
+
+    def on_written(version):
+        entry = server_config_cache.get(str(guild_id))
+        if entry and entry[0] is config_data and not state_writer.is_pending(key):
+            server_config_cache[str(guild_id)] = (config_data, version)
+
+    state_writer.schedule(key, config_data, copy.deepcopy, write, on_written)
+
+def invalidate_server_config(guild_id):
+    if server_config_cache.pop(str(guild_id), None) is not None:
+        config_cache_stats["invalidations"] += 1
 
 def load_or_create_server_config(guild_id):
-    config_file = os.path.join(BASE_DIR, f"configs/config_{guild_id}.json")
-    if os.path.exists(config_file):
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-    else:
+    version = config_storage.version(guild_id)
+    cached = server_config_cache.get(str(guild_id))
+    if cached:
+        if cached[1] == version or state_writer.is_pending(("config", str(guild_id))):
+            config_cache_stats["hits"] += 1
+            return cached[0]
+        # The config was edited, replaced, or removed outside of save_config
+        config_cache_stats["invalidations"] += 1
+    config_cache_stats["misses"] += 1
+    config = config_storage.load(guild_id)
+    if config is None:
         config = {
             "log_channel_id": None,
             "admin_roles": [],
             "mode": "single",
             "default_sound": "Cheers_Bitch.mp3"
         }
-        save_config(guild_id, config)
+        write_config(guild_id, config)
 
     config.setdefault("log_channel_id", None)
     config.setdefault("admin_roles", [])
@@ -184,6 +240,7 @@ def load_or_create_server_config(guild_id):
     config.setdefault("default_sound", "Cheers_Bitch.mp3")
     config.setdefault("blacklist_channels", [])
     config.setdefault("local_cheers_count", 0)
+    server_config_cache[str(guild_id)] = (config, config_storage.version(guild_id))
     return config
 
 async def update_server_list():
@@ -272,12 +329,70 @@ async def create_unlimited_invite(guild):
 
 async def save_config(guild_id, config_data):
     async with config_lock:
-        config_file = os.path.join(BASE_DIR, f"configs/config_{guild_id}.json")
-        with open(config_file, 'w') as f:
-            json.dump(config_data, f, indent=4)
+        write_config(guild_id, config_data)
+    # Both indexes only act on fields that changed, so saves that just bump counters stay cheap
+    update_timezone_schedule(guild_id, config_data)
+    guild = bot.get_guild(int(guild_id))
+    if guild:
+        voice_occupancy.configure(guild, config_data)
 
 def get_available_sounds():
-    return [f for f in os.listdir(SOUND_FOLDER) if f.endswith('.mp3')]
+    return sound_catalog.names()
+
+def create_audio_source(sound_path):
+    """Stream the shared pre-encoded Opus frames for a sound, falling back to FFmpeg until they exist."""
+    frame_buffer = opus_cache.get(os.path.basename(sound_path))
+    if frame_buffer:
+        return sound_lib.FrameCursor(frame_buffer)
+    return discord.FFmpegPCMAudio(sound_path, executable=ffmpeg_path)
+
+# Extra time allowed past a sound's known length before playback is considered stuck,
+# and the limit used for sounds whose length hasn't been probed yet
+PLAYBACK_TIMEOUT_MARGIN_SECONDS = 10
+PLAYBACK_TIMEOUT_UNKNOWN_SECONDS = 120
+
+def get_playback_timeout(sound_path, audio_source):
+    duration = getattr(audio_source, "duration", None)
+    if duration is None:
+        info = sound_catalog.get(os.path.basename(sound_path))
+        duration = info["duration"] if info else None
+    if duration is None:
+        return PLAYBACK_TIMEOUT_UNKNOWN_SECONDS
+    return duration + PLAYBACK_TIMEOUT_MARGIN_SECONDS
+
+def start_playback(vc, audio_source):
+    """Play audio_source on vc. Returns a future resolved with the player's error (or None) once playback ends."""
+    loop = asyncio.get_running_loop()
+    finished = loop.create_future()
+
+    def resolve(error):
+        if not finished.done():
+            finished.set_result(error)
+
+    # after= runs on the voice player's thread
+    vc.play(audio_source, after=lambda error: loop.call_soon_threadsafe(resolve, error))
+    return finished
+
+async def wait_for_playback(vc, finished, timeout):
+    """Wait for playback started by start_playback to end. Returns the player's error, if any.
+
+    Playback still running after timeout seconds is stopped and reported as a TimeoutError.
+    """
+    try:
+        return await asyncio.wait_for(finished, timeout)
+    except asyncio.TimeoutError:
+        vc.stop()
+        return asyncio.TimeoutError(f"playback still running after {timeout:.0f}s")
+
+def describe_sound(sound):
+    info = sound_catalog.get(sound)
+    if not info or info["duration"] is None:
+        return None
+    return f"{info['duration']:.1f}s · {info['size'] / 1024:.0f} KB"
+
+def refresh_sound_catalog():
+    if sound_catalog.refresh():
+        sound_catalog.schedule_prepare()
 
 async def log_action(guild, title, description, user):
     server_config = load_or_create_server_config(guild.id)
@@ -287,12 +402,10 @@ async def log_action(guild, title, description, user):
     log_channel = bot.get_channel(log_channel_id)
     if not log_channel:
         return
-    with open(config_path, 'r') as f:
-        global_config = json.load(f)
-    log_settings = global_config.get("log_settings", {})
-    footer_text = log_settings.get("footer_text", "CheersBot V2.0 by HomiesHouse | Discord.gg/HomiesHouse")
-    footer_icon_url = log_settings.get("footer_icon_url", "https://i.imgur.com/4OO5wh0.png")
-    thumbnail_url = log_settings.get("thumbnail_url", "https://i.imgur.com/4OO5wh0.png")
+    global_config = bot.global_config
+    footer_text = global_config.footer_text
+    footer_icon_url = global_config.footer_icon_url
+    thumbnail_url = global_config.thumbnail_url
     guild_icon_url = guild.icon.url if guild.icon else thumbnail_url
     embed = discord.Embed(
         title=title,
@@ -346,16 +459,10 @@ bot.command_prefix = "c."
 bot.topgg_client = None  # Initialize topgg_client as None, to be set in on_ready
 
 def is_developer(interaction: discord.Interaction) -> bool:
-    with open(config_path, 'r') as f:
-        global_config = json.load(f)
-    developer_ids = global_config.get("bot_developer_ids", [])
-    return str(interaction.user.id) in developer_ids
+    return str(interaction.user.id) in bot.global_config.developer_ids
 
 def check_admin_or_developer(interaction: discord.Interaction) -> bool:
-    with open(config_path, 'r') as f:
-        global_config = json.load(f)
-    developer_ids = global_config.get("bot_developer_ids", [])
-    if str(interaction.user.id) in developer_ids:
+    if str(interaction.user.id) in bot.global_config.developer_ids:
         return True
     server_config = load_or_create_server_config(interaction.guild.id)
     admin_roles = server_config.get('admin_roles', [])
@@ -365,11 +472,9 @@ def check_admin_or_developer(interaction: discord.Interaction) -> bool:
     )
 
 def is_setup_complete(guild_id):
-    config_file = get_config_filepath(guild_id)
-    if not os.path.exists(config_file):
+    if str(guild_id) not in server_config_cache and not config_storage.exists(guild_id):
         return False
-    with open(config_file, 'r') as f:
-        config = json.load(f)
+    config = load_or_create_server_config(guild_id)
     return config.get('log_channel_id') is not None and config.get('admin_roles')
 
 async def ensure_setup(interaction: discord.Interaction):
@@ -378,20 +483,103 @@ async def ensure_setup(interaction: discord.Interaction):
         return False
     return True
 
+class GlobalConfig(dict):
+    """The parsed config.json, with the values hot paths need precomputed.
+
+    It still behaves like the plain dict the cogs use. /reload and the file
+    watcher swap in a whole new instance rather than editing this one.
+    """
+
+    def __init__(self, data, mtime=None):
+        super().__init__(data)
+        self.mtime = mtime
+        self.developer_ids = frozenset(str(dev_id) for dev_id in data.get("bot_developer_ids", []))
+        self.primary_developer_id = next(iter(data.get("bot_developer_ids", [])), None)
+        log_settings = data.get("log_settings", {})
+        self.footer_text = log_settings.get("footer_text", "CheersBot V2.0 by HomiesHouse | Discord.gg/HomiesHouse")
+        self.footer_icon_url = log_settings.get("footer_icon_url", "https://i.imgur.com/4OO5wh0.png")
+        self.thumbnail_url = log_settings.get("thumbnail_url", "https://i.imgur.com/4OO5wh0.png")
+        self.discord_link = data.get("discord_link", "https://discord.gg/HomiesHouse")
+        self.website = data.get("website", "https://HomiesHouse.net")
+        self.master_server_id = data.get("master_server_id")
+        self.feedback_channel_id = data.get("feedback_channel_id")
+        self.developer_dm_channel_id = int(data["developer_dm_channel_id"]) if data.get("developer_dm_channel_id") else None
+        self.developer_dm_role_id = int(data["developer_dm_role_id"]) if data.get("developer_dm_role_id") else None
+        self.debug = data.get("debug", False)
+
 def load_global_config():
+    mtime = os.stat(config_path).st_mtime_ns
     with open(config_path, 'r') as f:
-        return json.load(f)
+        return GlobalConfig(json.load(f), mtime)
 
 global_config = load_global_config()
 bot.global_config = global_config
+
+# Per-guild config storage ("sqlite" keeps every guild in one WAL-mode database)
+STATE_DB_PATH = os.path.join(BASE_DIR, "cheersbot.db")
+config_storage = storage.create_config_storage(
+    global_config.get("storage_backend", "sqlite"),
+    os.path.join(BASE_DIR, CONFIG_DIR),
+    STATE_DB_PATH
+)
+if config_storage.name == "sqlite" and not config_storage.guild_ids():
+    imported = storage.migrate_json_configs(os.path.join(BASE_DIR, CONFIG_DIR), config_storage)
+    if imported:
+        logging.info(f"Imported {imported} server config(s) from {CONFIG_DIR} into {STATE_DB_PATH}")
+logging.info(f"Server config storage backend: {config_storage.name}")
+
+# Coalesces state file and config writes into one flush per interval, off the event loop
+state_writer = storage.StateWriter(global_config.get("state_flush_interval_seconds", 5))
+bot.state_writer = state_writer
+atexit.register(state_writer.flush_sync)
+blacklist_index.load()
+
+# Completed playbacks, batched through the state writer. They live in their own database:
+# commits to cheersbot.db from a second connection would bump the PRAGMA data_version
+# that the config cache uses to detect external edits, invalidating every cached config.
+PLAY_EVENTS_DB_PATH = os.path.join(BASE_DIR, "play_events.db")
+play_event_store = storage.PlayEventStore(PLAY_EVENTS_DB_PATH)
+
 bot.is_server_blacklisted = is_server_blacklisted
 bot.handle_blacklisted_server = handle_blacklisted_server
 bot.ensure_setup = ensure_setup
-debug_mode = global_config.get("debug", False)
+debug_mode = global_config.debug
 bot.load_or_create_server_config = load_or_create_server_config
+bot.config_cache_stats = config_cache_stats
 
 async def reload_global_config():
-    bot.global_config = load_global_config()
+    global global_config, debug_mode
+    new_config = load_global_config()
+    global_config = new_config
+    bot.global_config = new_config
+    debug_mode = new_config.debug
+
+@tasks.loop(seconds=30)
+async def watch_global_config_task():
+    try:
+        mtime = os.stat(config_path).st_mtime_ns
+    except FileNotFoundError:
+        return
+    if mtime != bot.global_config.mtime:
+        try:
+            await reload_global_config()
+            logging.info("config.json changed on disk, global config reloaded.")
+        except (OSError, json.JSONDecodeError) as e:
+            # The mtime is only recorded by a successful load, so a partial write is retried next tick
+            logging.error(f"Failed to reload config.json, keeping the previous config: {e}")
+
+@tasks.loop(seconds=30)
+async def watch_sound_folder_task():
+    if sound_catalog.refresh_if_changed():
+        logging.info(f"Sound folder changed, {len(sound_catalog.sounds)} sound(s) available.")
+        sound_catalog.schedule_prepare()
+
+@tasks.loop(hours=6)
+async def compact_play_events_task():
+    retention_days = bot.global_config.get("play_event_retention_days", 90)
+    deleted = await asyncio.to_thread(play_event_store.compact, retention_days)
+    if deleted:
+        logging.info(f"Compacted {deleted} play event(s) older than {retention_days} days.")
 
 master_server_id = global_config.get("master_server_id")
 
@@ -423,11 +611,8 @@ async def load_extensions():
             except Exception as e:
                 logging.error(f'Failed to load extension {filename}: {e}')
 
-@tasks.loop(seconds=1)
-async def log_current_time_task():
-    now = datetime.now(timezone.utc)
-    if now.minute % 5 == 0 and now.second == 0:
-        logging.info(f"Current time is {now.strftime('%H:%M')}")
+async def log_current_time(slot):
+    logging.info(f"Current time is {slot.strftime('%H:%M')}")
 
 # Task to post server count to Top.gg every 30 minutes
 @tasks.loop(minutes=30)
@@ -442,28 +627,62 @@ async def update_topgg_stats():
     except Exception as e:
         logging.error(f"Failed to post server count to Top.gg: {e}")
 
-scheduler = AsyncIOScheduler()
+# IANA zones for the timezone labels offered in /setup. Most labels are the fixed UTC offset they
+# name, so they map to zones without daylight saving time. The North American labels (AKST, PST,
+# MST, CST, EST) are meant as the local time of those regions and follow daylight saving time.
+TIMEZONE_LABEL_ZONES = {
+    "UTC -12 {ANAT}": "Etc/GMT+12",
+    "UTC -11 {AEDT}": "Pacific/Pago_Pago",
+    "UTC -10 {HAST}": "Pacific/Honolulu",
+    "UTC -9 {AKST}": "America/Anchorage",
+    "UTC -8 {PST}": "America/Los_Angeles",
+    "UTC -7 {MST}": "America/Denver",
+    "UTC -6 {CST}": "America/Chicago",
+    "UTC -5 {EST}": "America/New_York",
+    "UTC -4 {AST}": "America/Puerto_Rico",
+    "UTC -3 {BRT}": "America/Sao_Paulo",
+    "UTC -2 {GST}": "Atlantic/South_Georgia",
+    "UTC -1 {AZOT}": "Etc/GMT+1",
+    "UTC 0 {GMT}": "Etc/GMT",
+    "UTC +1 {CET}": "Etc/GMT-1",
+    "UTC +2 {EET}": "Etc/GMT-2",
+    "UTC +3 {MSK}": "Europe/Moscow",
+    "UTC +4 {GST}": "Asia/Dubai",
+    "UTC +5 {PKT}": "Asia/Karachi",
+    "UTC +6 {BST}": "Asia/Dhaka",
+    "UTC +7 {ICT}": "Asia/Bangkok",
+    "UTC +8 {ChinaST}": "Asia/Shanghai",
+    "UTC +9 {JST}": "Asia/Tokyo",
+    "UTC +10 {AEST}": "Australia/Brisbane",
+    "UTC +11 {AEDT}": "Pacific/Noumea",
+    "UTC +12 {NZST}": "Etc/GMT-12"
+}
+
+def get_timezone_zone(label):
+    """Map a join_timezones label to an IANA zone, falling back to a fixed UTC offset."""
+    if label in TIMEZONE_LABEL_ZONES:
+        return TIMEZONE_LABEL_ZONES[label]
+    tz_offset = int(label.split()[1].replace('UTC', '').replace('{', '').replace('}', ''))
+    # Etc/GMT zones use POSIX signs: Etc/GMT+5 is UTC-5
+    return f"Etc/GMT{-tz_offset:+d}" if tz_offset else "Etc/GMT"
+
+# Guilds with join_frequency 'timezones', grouped by the instants their 4:20 waves start (X:15 local)
+timezone_schedule = scheduling.ScheduleIndex([(4, 20), (16, 20)], timedelta(minutes=5), max_lateness=240)
+
+def update_timezone_schedule(guild_id, server_config):
+    zones = set()
+    if server_config.get('join_frequency') == 'timezones':
+        for label in server_config.get('join_timezones', []):
+            try:
+                zones.add(get_timezone_zone(label))
+            except (IndexError, ValueError) as e:
+                logging.error(f"Invalid timezone format for guild {guild_id}: {label} - {e}")
+    timezone_schedule.set_guild(int(guild_id), zones)
 
-def schedule_join_tasks():
-    for guild in bot.guilds:
-        if is_server_blacklisted(guild.id):
-            continue
-        server_config = load_or_create_server_config(guild.id)
-        join_frequency = server_config.get('join_frequency', 'every_hour')
-        if join_frequency == 'every_hour':
-            pass
-        elif join_frequency == 'timezones':
-            join_timezones = server_config.get('join_timezones', [])
-            for tz in join_timezones:
-                try:
-                    tz_offset = int(tz.split()[1].replace('UTC', '').replace('{', '').replace('}', ''))
-                    tz_obj = timezone(timedelta(hours=tz_offset))
-                    scheduler.add_job(join_and_play_420, 'cron', hour=4, minute=20, timezone=tz_obj, args=[guild])
-                    scheduler.add_job(join_and_play_420, 'cron', hour=16, minute=20, timezone=tz_obj, args=[guild])
-                except (IndexError, ValueError) as e:
-                    logging.error(f"Invalid timezone format for {guild.name}: {tz} - {e}")
-        elif join_frequency == 'manual':
-            pass
+def build_timezone_schedule():
+    # Only guilds set to 'timezones' are indexed; the indexed lookup avoids loading every config
+    for guild_id in config_storage.find_guild_ids(join_frequency='timezones'):
+        update_timezone_schedule(guild_id, load_or_create_server_config(guild_id))
 
 @bot.event
 async def on_ready():
@@ -480,8 +699,18 @@ async def on_ready():
         logging.error(f"Failed to initialize Top.gg client: {e}")
         bot.topgg_client = None
 
-    if not auto_join_task.is_running():
-        auto_join_task.start()
+    state_writer.start()
+    if not watch_global_config_task.is_running():
+        watch_global_config_task.start()
+    if not compact_play_events_task.is_running():
+        compact_play_events_task.start()
+    sound_catalog.schedule_prepare()
+    if not watch_sound_folder_task.is_running():
+        watch_sound_folder_task.start()
+    if not reap_voice_clients_task.is_running():
+        reap_voice_clients_task.start()
+
+    wave_scheduler.start()
     
     server_count = len(bot.guilds)
     await bot.change_presence(activity=discord.Activity(
@@ -513,12 +742,10 @@ async def on_ready():
         except Exception as e:
             logging.error(f"Failed to reload view for message {message_id}: {e}")
 
-    if not scheduler.running:
-        scheduler.start()
-        logging.info("Scheduler started in on_ready.")
-        schedule_join_tasks()
-    else:
-        logging.info("Scheduler already running, skipping start.")
+    if timezone_schedule.task is None:
+        build_timezone_schedule()
+        logging.info(f"Timezone schedule built for {len(timezone_schedule.guild_zones)} server(s).")
+    timezone_schedule.start(timezone_wave)
 
     if debug_mode:
         logging.info("Debug mode enabled. Listing first 20 servers:")
@@ -528,6 +755,7 @@ async def on_ready():
             logging.info(f"Total number of servers: {len(bot.guilds)}")
         logging.info(f"Sound folder path: {SOUND_FOLDER}")
         logging.info(f"Configs folder path: {CONFIG_DIR}")
+        logging.info(f"Config storage backend: {config_storage.name}")
         logging.info(f"Server logs directory: {SERVER_LOG_DIR}")
         logging.info(f"Server list path: {SERVER_LIST_PATH}")
         logging.info(f"Master server list path: {MASTER_SERVER_LIST_PATH}")
@@ -540,12 +768,8 @@ async def on_ready():
     except Exception as e:
         logging.error(f"Failed to sync commands: {str(e)}")
 
-    now = datetime.now(timezone.utc)
-    if now.minute >= 15 and now.minute < 20:
-        for guild in bot.guilds:
-            server_config = load_or_create_server_config(guild.id)
-            if server_config.get('join_frequency', 'every_hour') == 'every_hour':
-                await join_all_populated_voice_channels(guild)
+    build_voice_occupancy()
+    await catch_up_missed_waves()
 
 def save_views_on_exit():
     save_feedback_views({str(k): v for k, v in persistent_views.items()})
@@ -578,6 +802,7 @@ async def send_intro_message(guild):
 
 @bot.event
 async def on_guild_join(guild):
+    voice_occupancy.configure(guild, load_or_create_server_config(guild.id))
     invite_url = "No Invites"
     try:
         invites = await guild.invites()
@@ -610,9 +835,15 @@ async def on_guild_remove(guild):
     await update_server_list()
     reason = "Left the server"
     log_to_master_server_list("Left", guild, reason=reason)
-    config_file = get_config_filepath(guild.id)
-    if os.path.exists(config_file):
-        os.remove(config_file)
+    invalidate_server_config(guild.id)
+    timezone_schedule.remove_guild(guild.id)
+    voice_occupancy.remove_guild(guild.id)
+    voice_sessions.pop(guild.id, None)
+    voice_breaker.reset(guild.id)
+    voice_permissions.invalidate_guild(guild.id)
+    last_voice_trigger.pop(guild.id, None)
+    state_writer.discard(("config", str(guild.id)))
+    if config_storage.delete(guild.id):
         logging.info(f"Deleted config for {guild.name} (ID: {guild.id})")
     server_count = len(bot.guilds)
     await bot.change_presence(activity=discord.Activity(
@@ -708,6 +939,7 @@ class ChangeSoundNameView(ui.View):
             new_filename = f"{new_name}.mp3"
             new_filepath = os.path.join(SOUND_FOLDER, new_filename)
             await self.audio_files[self.current_file_index].save(new_filepath)
+            refresh_sound_catalog()
             self.feedback_embed.color = discord.Color.green()
             self.feedback_embed.add_field(name="Status", value=f"Approved by {interaction.user.mention}", inline=False)
             self.feedback_embed.add_field(name="Original Name", value=self.audio_files[self.current_file_index].filename, inline=False)
@@ -741,6 +973,7 @@ class ChangeSoundNameView(ui.View):
         try:
             original_filepath = os.path.join(SOUND_FOLDER, self.audio_files[self.current_file_index].filename)
             await self.audio_files[self.current_file_index].save(original_filepath)
+            refresh_sound_catalog()
             self.feedback_embed.color = discord.Color.green()
             self.feedback_embed.add_field(name="Status", value=f"Approved by {interaction.user.mention}", inline=False)
             self.feedback_embed.add_field(name="Original Name", value=self.audio_files[self.current_file_index].filename, inline=False)
@@ -815,14 +1048,9 @@ async def feedback(interaction: discord.Interaction):
             color=discord.Color.yellow()
         )
         feedback_embed.set_author(name=interaction.user.name, icon_url=interaction.user.avatar.url)
-        with open(config_path, 'r') as f:
-            global_config = json.load(f)
-        log_settings = global_config.get("log_settings", {})
-        footer_text = log_settings.get("footer_text", "CheersBot V2.0 by HomiesHouse | Discord.gg/HomiesHouse")
-        footer_icon_url = log_settings.get("footer_icon_url", "https://i.imgur.com/4OO5wh0.png")
-        thumbnail_url = log_settings.get("thumbnail_url", "https://i.imgur.com/4OO5wh0.png")
-        feedback_embed.set_footer(text=footer_text, icon_url=footer_icon_url)
-        feedback_embed.set_thumbnail(url=thumbnail_url)
+        global_config = bot.global_config
+        feedback_embed.set_footer(text=global_config.footer_text, icon_url=global_config.footer_icon_url)
+        feedback_embed.set_thumbnail(url=global_config.thumbnail_url)
         files = []
         image_count = 0
         audio_count = 0
@@ -835,7 +1063,7 @@ async def feedback(interaction: discord.Interaction):
             elif attachment.filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
                 files.append(await attachment.to_file())
                 image_count += 1
-        feedback_channel_id = global_config.get("feedback_channel_id")
+        feedback_channel_id = global_config.feedback_channel_id
         if not feedback_channel_id:
             raise ValueError("Feedback channel ID is not set in the configuration.")
         feedback_channel = bot.get_channel(int(feedback_channel_id))
@@ -849,8 +1077,8 @@ async def feedback(interaction: discord.Interaction):
             except Exception as e:
                 logging.error(f"Error fetching feedback channel {feedback_channel_id}: {e}")
         if feedback_channel:
-            if str(feedback_channel.guild.id) != global_config.get("master_server_id"):
-                logging.error(f"Feedback channel {feedback_channel_id} is in guild {feedback_channel.guild.id}, not master server {global_config.get('master_server_id')}")
+            if str(feedback_channel.guild.id) != global_config.master_server_id:
+                logging.error(f"Feedback channel {feedback_channel_id} is in guild {feedback_channel.guild.id}, not master server {global_config.master_server_id}")
             if not feedback_channel.permissions_for(feedback_channel.guild.me).send_messages:
                 logging.error(f"Bot lacks Send Messages permission in feedback channel {feedback_channel_id}")
             elif not feedback_channel.permissions_for(feedback_channel.guild.me).embed_links:
@@ -907,9 +1135,7 @@ async def feedback(interaction: discord.Interaction):
 
 @bot.command(name='feedback_unban', aliases=['Feedback_unban', 'feedback_Unban', 'Feedback_Unban'])
 async def feedback_unban(ctx):
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-    if str(ctx.author.id) not in config['bot_developer_ids']:
+    if str(ctx.author.id) not in bot.global_config.developer_ids:
         await ctx.send('You do not have permission to use this command.')
         return
     await ctx.send('Please provide the user ID to unban:')
@@ -928,209 +1154,717 @@ async def feedback_unban(ctx):
     except asyncio.TimeoutError:
         await ctx.send('You took too long to respond. Please try again.')
 
-async def increment_420_somewhere_count(num_servers=1):
-    async with cheers_count_lock:
-        cheers_count = load_cheers_count()
-        cheers_count['its_420_somewhere_count'] = cheers_count.get('its_420_somewhere_count', 0) + num_servers
-        cheers_count['total_smoke_seshes_count'] = cheers_count['its_420_somewhere_count'] + cheers_count['manual_smoke_seshes_count']
-        save_cheers_count(cheers_count)
-        if debug_mode:
-            logging.info(f"Incremented 420 somewhere count by {num_servers}. New value: {cheers_count['its_420_somewhere_count']}")
+CHEERS_COUNT_FILE = 'cheers-count.json'
+
+class CheersCounter:
+    """In-memory cheers-count.json counters.
+
+    Increments only touch memory plus one line in an append-only journal; the
+    state writer persists a snapshot every flush interval. Each snapshot records
+    the last journal segment it includes (journal_seq), so after a crash
+    load() replays only the segments written since the last good snapshot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.counts = {}
+        self.journal = None
+        self.journal_seq = 0
+        self.stale_seqs = []
+
+    def get_journal_path(self, seq):
+        return f"{self.path}.journal.{seq}"
+
+    def find_journal_seqs(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        prefix = os.path.basename(self.path) + ".journal."
+        return sorted(
+            int(filename[len(prefix):]) for filename in os.listdir(directory)
+            if filename.startswith(prefix) and filename[len(prefix):].isdigit()
+        )
+
+    def load(self):
+        counts = state_writer.read_json(self.path, {})
+        counts.setdefault('its_420_somewhere_count', 0)
+        counts.setdefault('manual_smoke_seshes_count', 0)
+        counts.setdefault('sound_play_counts', {})
+        snapshot_seq = counts.pop('journal_seq', 0)
+        replayed = 0
+        seqs = self.find_journal_seqs()
+        for seq in seqs:
+            if seq > snapshot_seq:
+                with open(self.get_journal_path(seq), 'r') as f:
+                    for line in f:
+                        try:
+                            key, amount = json.loads(line)
+                        except ValueError:
+                            continue  # Torn final line from a crash mid-write
+                        self.apply(counts, key, amount)
+                        replayed += 1
+            self.stale_seqs.append(seq)
+        counts['total_smoke_seshes_count'] = counts['its_420_somewhere_count'] + counts['manual_smoke_seshes_count']
+        self.counts = counts
+        self.journal_seq = max(seqs + [snapshot_seq]) + 1
+        self.journal = open(self.get_journal_path(self.journal_seq), 'a', buffering=1)
+        if replayed:
+            logging.info(f"Recovered {replayed} cheers count increment(s) from the journal.")
+        if replayed or self.stale_seqs:
+            self.schedule_flush()
+
+    def apply(self, counts, key, amount):
+        if key.startswith("sound:"):
+            sound_name = key[len("sound:"):]
+            counts['sound_play_counts'][sound_name] = counts['sound_play_counts'].get(sound_name, 0) + amount
+        else:
+            counts[key] = counts.get(key, 0) + amount
+            counts['total_smoke_seshes_count'] = counts['its_420_somewhere_count'] + counts['manual_smoke_seshes_count']
+
+    def increment(self, key, amount=1):
+        self.apply(self.counts, key, amount)
+        try:
+            self.journal.write(json.dumps([key, amount]) + "\n")
+        except (OSError, ValueError) as e:
+            logging.error(f"Error writing cheers count journal: {e}")
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        state_writer.schedule(self.path, self.counts, self.serialize, self.write, self.forget_journals)
+
+    def serialize(self, counts):
+        # Start a new journal segment; everything in the old ones is part of this snapshot
+        self.journal.close()
+        self.stale_seqs.append(self.journal_seq)
+        snapshot_seq = self.journal_seq
+        self.journal_seq += 1
+        self.journal = open(self.get_journal_path(self.journal_seq), 'a', buffering=1)
+        # Stale segments stay listed until the snapshot covering them is written, so a failed write retries them
+        return json.dumps(dict(counts, journal_seq=snapshot_seq), indent=4), list(self.stale_seqs)
+
+    def write(self, payload):
+        text, stale_seqs = payload
+        storage.atomic_write_text(self.path, text)
+        for seq in stale_seqs:
+            try:
+                os.remove(self.get_journal_path(seq))
+            except FileNotFoundError:
+                pass
+        return stale_seqs
+
+    def forget_journals(self, removed_seqs):
+        self.stale_seqs = [seq for seq in self.stale_seqs if seq not in removed_seqs]
+
+cheers_counter = CheersCounter(CHEERS_COUNT_FILE)
+cheers_counter.load()
 
 def load_cheers_count():
-    with open('cheers-count.json', 'r') as f:
-       return json.load(f)
+    return cheers_counter.counts
 
-def save_cheers_count(data):
-    try:
-        with open('cheers-count.json', 'w') as f:
-            json.dump(data, f, indent=4)
-    except Exception as e:
-        logging.error(f"Error saving cheers-count.json: {e}")
+def increment_420_somewhere_count(num_servers=1):
+    cheers_counter.increment('its_420_somewhere_count', num_servers)
+    if debug_mode:
+        logging.info(f"Incremented 420 somewhere count by {num_servers}. New value: {cheers_counter.counts['its_420_somewhere_count']}")
 
-async def increment_manual_smoke_seshes_count():
-    async with cheers_count_lock:
-        cheers_count = load_cheers_count()
-        cheers_count['manual_smoke_seshes_count'] = cheers_count.get('manual_smoke_seshes_count', 0) + 1
-        cheers_count['total_smoke_seshes_count'] = cheers_count['its_420_somewhere_count'] + cheers_count['manual_smoke_seshes_count']
-        save_cheers_count(cheers_count)
+def increment_manual_smoke_seshes_count():
+    cheers_counter.increment('manual_smoke_seshes_count')
 
-async def increment_sound_play_count(sound_name):
-    async with cheers_count_lock:
-        cheers_count = load_cheers_count()
-        cheers_count['sound_play_counts'][sound_name] = cheers_count['sound_play_counts'].get(sound_name, 0) + 1
-        save_cheers_count(cheers_count)
+def increment_sound_play_count(sound_name):
+    cheers_counter.increment(f"sound:{sound_name}")
+
+play_event_buffer = []
+
+def take_play_events(events):
+    # Events leave the buffer only once their batch is stored, so a failed write is retried with them
+    return list(events)
+
+def write_play_events(batch):
+    play_event_store.record_many(batch)
+    return len(batch)
+
+def drop_written_play_events(count):
+    # Events recorded during the write were appended after the batch
+    del play_event_buffer[:count]
+
+def record_play_event(guild, channel, sound_name, trigger, listeners, started_at):
+    play_event_buffer.append({
+        "guild_id": guild.id,
+        "channel_id": channel.id,
+        "sound": sound_name,
+        "trigger": trigger,
+        "listeners": listeners,
+        "started_at": started_at,
+        "finished_at": time.time()
+    })
+    state_writer.schedule("play_events", play_event_buffer, take_play_events, write_play_events, drop_written_play_events)
+
+def count_listeners(channel):
+    return sum(1 for member in channel.members if not member.bot)
 
 async def increment_local_cheers_count(guild_id):
-    async with config_lock:
-        server_config = load_or_create_server_config(guild_id)
-        server_config['local_cheers_count'] = server_config.get('local_cheers_count', 0) + 1
-        save_config(guild_id, server_config)
+    server_config = load_or_create_server_config(guild_id)
+    server_config['local_cheers_count'] = server_config.get('local_cheers_count', 0) + 1
+    await save_config(guild_id, server_config)
+
+# Recent voice connect durations, used to decide how early just-in-time guilds must connect
+connect_latency = scheduling.LatencyTracker()
+
+# Shared by every wave so overlapping waves together respect the per-shard connect rate
+connect_limiter = None
+
+def get_connect_limiter():
+    """The process-wide ConnectLimiter, rebuilt only when its config.json settings change."""
+    global connect_limiter
+    global_config = bot.global_config
+    settings = (
+        global_config.get("wave_max_concurrent_joins", 20),
+        global_config.get("wave_joins_per_second_per_shard", 2),
+        global_config.get("wave_join_burst_per_shard", 5)
+    )
+    if connect_limiter is None or connect_limiter.settings() != settings:
+        connect_limiter = scheduling.ConnectLimiter(*settings)
+    return connect_limiter
+
+def create_wave_executor():
+    return scheduling.WaveExecutor(
+        get_connect_limiter(),
+        transient=(discord.errors.ConnectionClosed, asyncio.TimeoutError),
+        latency_tracker=connect_latency
+    )
 
-async def join_and_play_sound(guild, voice_channel, user):
-    vc = None
-    try:
-        vc = await voice_channel.connect(reconnect=True)
-        logging.info(f"Joined {voice_channel.name} in {guild.name}.")
-        await log_action(
-            guild, "Joined Voice Channel",
-            f"Joined **{voice_channel.name}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.",
-            user
+LISTENER_FILTER_DEFAULTS = {
+    "ignore_bots": True,
+    "ignore_afk_channel": True,
+    "ignore_self_deafened": False
+}
+
+def get_listener_filter(server_config):
+    return {key: server_config.get(key, default) for key, default in LISTENER_FILTER_DEFAULTS.items()}
+
+class VoicePermissionCache:
+    """The bot's Connect/Speak permissions per voice channel, computed on first use.
+
+    Entries are dropped when something that can change them happens: a role
+    or channel update, or a change to the bot's own roles. Whether a channel
+    is full is checked against its live member count on every lookup.
+    """
+
+    def __init__(self):
+        self.guilds = {}  # guild ID -> {voice channel ID: (can_connect, can_speak, bypasses_user_limit)}
+
+    def get(self, channel):
+        channels = self.guilds.setdefault(channel.guild.id, {})
+        entry = channels.get(channel.id)
+        if entry is None:
+            permissions = channel.permissions_for(channel.guild.me)
+            # Members with Move Members can join channels that are at their user limit
+            entry = (permissions.connect, permissions.speak, permissions.move_members)
+            channels[channel.id] = entry
+        return entry
+
+    def evaluate(self, channel):
+        """Return (can_connect, can_speak, user_limit_full) for the bot in channel."""
+        can_connect, can_speak, bypasses_user_limit = self.get(channel)
+        user_limit_full = bool(channel.user_limit) and len(channel.members) >= channel.user_limit and not bypasses_user_limit
+        return can_connect, can_speak, user_limit_full
+
+    def is_joinable(self, channel):
+        can_connect, can_speak, user_limit_full = self.evaluate(channel)
+        return can_connect and can_speak and not user_limit_full
+
+    def describe_problem(self, channel):
+        can_connect, can_speak, user_limit_full = self.evaluate(channel)
+        if not can_connect:
+            return f"Missing the Connect permission in {channel.name}"
+        if not can_speak:
+            return f"Missing the Speak permission in {channel.name}"
+        if user_limit_full:
+            return f"{channel.name} is full ({channel.user_limit} member limit)"
+        return None
+
+    def invalidate_guild(self, guild_id):
+        self.guilds.pop(guild_id, None)
+
+    def invalidate_channel(self, channel):
+        self.guilds.get(channel.guild.id, {}).pop(channel.id, None)
+
+voice_permissions = VoicePermissionCache()
+
+class VoiceOccupancy:
+    """Live listener counts for every voice channel, kept current from voice state events.
+
+    Only members who can actually hear the cheers are counted: bots, the AFK
+    channel, and (optionally) self-deafened members are excluded according to
+    each guild's listener filter. For each guild it also remembers the busiest
+    voice channel that isn't in the guild's blacklist_channels, so picking
+    where to join is a dict lookup. If the bot can't join that channel, the
+    busiest one it can join is used instead.
+    """
+
+    def __init__(self, permissions):
+        self.permissions = permissions
+        self.channels = {}  # guild ID -> {voice channel ID: listener count}
+        self.blacklists = {}  # guild ID -> set of blacklisted channel IDs
+        self.filters = {}  # guild ID -> listener filter
+        self.best = {}  # guild ID -> busiest eligible voice channel ID
+
+    def configure(self, guild, server_config):
+        """Apply a guild's blacklist and listener filter, redoing only the work a change needs."""
+        blacklist = {int(channel_id) for channel_id in server_config.get("blacklist_channels", [])}
+        listener_filter = get_listener_filter(server_config)
+        configured = guild.id in self.channels
+        blacklist_changed = blacklist != self.blacklists.get(guild.id)
+        filter_changed = listener_filter != self.filters.get(guild.id)
+        self.blacklists[guild.id] = blacklist
+        self.filters[guild.id] = listener_filter
+        if not configured or filter_changed:
+            # Listener counts depend on the filter, so every channel has to be recounted
+            self.rebuild_guild(guild)
+        elif blacklist_changed:
+            self.recompute(guild.id)
+
+    def is_listener(self, member, listener_filter):
+        if listener_filter["ignore_bots"] and member.bot:
+            return False
+        if listener_filter["ignore_self_deafened"] and member.voice and member.voice.self_deaf:
+            return False
+        return True
+
+    def count_listeners(self, channel):
+        listener_filter = self.filters.get(channel.guild.id, LISTENER_FILTER_DEFAULTS)
+        if listener_filter["ignore_afk_channel"] and channel == channel.guild.afk_channel:
+            return 0
+        return sum(1 for member in channel.members if self.is_listener(member, listener_filter))
+
+    def rebuild_guild(self, guild):
+        self.channels[guild.id] = {vc.id: self.count_listeners(vc) for vc in guild.voice_channels}
+        self.recompute(guild.id)
+
+    def remove_guild(self, guild_id):
+        self.channels.pop(guild_id, None)
+        self.blacklists.pop(guild_id, None)
+        self.filters.pop(guild_id, None)
+        self.best.pop(guild_id, None)
+
+    def update_channels(self, guild, *channels):
+        counts = self.channels.setdefault(guild.id, {})
+        for channel in channels:
+            if isinstance(channel, discord.VoiceChannel):
+                counts[channel.id] = self.count_listeners(channel)
+        self.recompute(guild.id)
+
+    def recompute(self, guild_id):
+        blacklist = self.blacklists.get(guild_id, set())
+        eligible = [
+            (count, channel_id) for channel_id, count in self.channels.get(guild_id, {}).items()
+            if count > 0 and channel_id not in blacklist
+        ]
+        if eligible:
+            self.best[guild_id] = max(eligible)[1]
+        else:
+            self.best.pop(guild_id, None)
+
+    def populated_guild_ids(self):
+        return list(self.best)
+
+    def listeners(self, channel):
+        return self.channels.get(channel.guild.id, {}).get(channel.id, 0)
+
+    def busiest_channel(self, guild):
+        """The busiest eligible voice channel, whether or not the bot can join it."""
+        channel_id = self.best.get(guild.id)
+        return guild.get_channel(channel_id) if channel_id else None
+
+    def best_channel(self, guild):
+        channel_id = self.best.get(guild.id)
+        if not channel_id:
+            return None
+        channel = guild.get_channel(channel_id)
+        if channel and self.permissions.is_joinable(channel):
+            return channel
+        blacklist = self.blacklists.get(guild.id, set())
+        ranked = sorted(
+            ((count, channel_id) for channel_id, count in self.channels.get(guild.id, {}).items()
+             if count > 0 and channel_id not in blacklist),
+            reverse=True
         )
+        for _, channel_id in ranked:
+            channel = guild.get_channel(channel_id)
+            if channel and self.permissions.is_joinable(channel):
+                return channel
+        return None
+
+voice_occupancy = VoiceOccupancy(voice_permissions)
+
+def build_voice_occupancy():
+    for guild in bot.guilds:
+        voice_occupancy.configure(guild, load_or_create_server_config(guild.id))
+
+@bot.event
+async def on_voice_state_update(member, before, after):
+    if before.channel != after.channel:
+        voice_occupancy.update_channels(member.guild, before.channel, after.channel)
+    elif before.self_deaf != after.self_deaf:
+        voice_occupancy.update_channels(member.guild, after.channel)
+
+@bot.event
+async def on_guild_update(before, after):
+    if before.afk_channel != after.afk_channel:
+        voice_occupancy.rebuild_guild(after)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    voice_permissions.invalidate_channel(channel)
+    if isinstance(channel, discord.VoiceChannel):
+        voice_occupancy.rebuild_guild(channel.guild)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    if isinstance(after, discord.CategoryChannel):
+        # Synced channels inherit the category's overwrites
+        voice_permissions.invalidate_guild(after.guild.id)
+    else:
+        voice_permissions.invalidate_channel(after)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    voice_permissions.invalidate_guild(after.guild.id)
+
+@bot.event
+async def on_guild_role_delete(role):
+    voice_permissions.invalidate_guild(role.guild.id)
+
+@bot.event
+async def on_member_update(before, after):
+    if after.id == bot.user.id and before.roles != after.roles:
+        voice_permissions.invalidate_guild(after.guild.id)
+
+def get_wave_voice_channel(guild):
+    return voice_occupancy.best_channel(guild)
+
+def get_just_in_time_lead_seconds(guilds):
+    """How long before X:20 just-in-time guilds must start connecting.
+
+    The configured lead plus the 90th percentile of recent connect times, plus
+    the time the busiest shard's token bucket needs to let every guild through.
+    """
+    global_config = bot.global_config
+    lead = global_config.get("jit_join_lead_seconds", 20)
+    lead += connect_latency.percentile(90) or 0
+    guilds_per_shard = {}
+    for guild in guilds:
+        guilds_per_shard[guild.shard_id] = guilds_per_shard.get(guild.shard_id, 0) + 1
+    burst = global_config.get("wave_join_burst_per_shard", 5)
+    rate = global_config.get("wave_joins_per_second_per_shard", 2)
+    lead += max(0, max(guilds_per_shard.values()) - burst) / rate
+    return lead
+
+def get_spread_connect_time(guild, slot):
+    """When an early-mode guild connects. Without spreading this is X:15 for every guild."""
+    spread_seconds = min(bot.global_config.get("wave_spread_seconds", 0), 240)
+    if not spread_seconds:
+        return None
+    return slot + timedelta(seconds=scheduling.spread_offset(guild.id, spread_seconds))
+
+WAVE_STATE_PATH = os.path.join(SERVER_LOG_DIR, "WaveState.json")
+# Wave key ("hourly" or "timezone") -> last wave's slot, whether it completed, and the guilds that played
+wave_state = state_writer.read_json(WAVE_STATE_PATH, {})
+# (wave key, slot) pairs currently running, so a catch-up never duplicates a live wave
+active_waves = set()
+
+def save_wave_state():
+    state_writer.write_json(WAVE_STATE_PATH, wave_state)
+
+def is_wave_done(wave_key, slot):
+    entry = wave_state.get(wave_key)
+    if not entry:
+        return False
+    recorded_slot = datetime.fromisoformat(entry["slot"])
+    return recorded_slot > slot or (recorded_slot == slot and entry["completed"])
+
+def get_catch_up_cutoff(now):
+    """Waves that started after the returned time may still be caught up, per wave_catch_up_policy.
+
+    "none" never catches up, "before_play" (the default) only while X:20 is
+    still ahead, and "late" also up to wave_catch_up_late_minutes after X:20.
+    """
+    policy = bot.global_config.get("wave_catch_up_policy", "before_play")
+    if policy == "none":
+        return None
+    cutoff = now - timedelta(minutes=5)
+    if policy == "late":
+        cutoff -= timedelta(minutes=bot.global_config.get("wave_catch_up_late_minutes", 10))
+    return cutoff
+
+async def catch_up_missed_waves():
+    now = datetime.now(timezone.utc)
+    cutoff = get_catch_up_cutoff(now)
+    if cutoff is None:
+        return
+    missed = []
+    slot = scheduling.hourly_at(15)(cutoff)
+    if slot <= now and not is_wave_done("hourly", slot):
+        missed.append(auto_join_wave(slot))
+    for instant, guild_ids in sorted(timezone_schedule.due_between(cutoff, now).items()):
+        if not is_wave_done("timezone", instant):
+            missed.append(timezone_wave(instant, guild_ids))
+    if missed:
+        logging.info(f"Catching up {len(missed)} missed wave(s).")
+        await asyncio.gather(*missed)
+
+async def auto_join_wave(slot):
+    guilds = []
+    # Only guilds with someone in an eligible voice channel can take part
+    for guild_id in voice_occupancy.populated_guild_ids():
+        guild = bot.get_guild(guild_id)
+        if not guild or is_server_blacklisted(guild.id):
+            continue
         server_config = load_or_create_server_config(guild.id)
-        mode = server_config.get("mode", "single")
-        default_sound = server_config.get("default_sound", "Cheers_Bitch.mp3")
-        available_sounds = get_available_sounds()
-        if mode == "single":
-            sound_to_play = os.path.join(SOUND_FOLDER, default_sound)
+        join_frequency = server_config.get('join_frequency', 'every_hour')
+        if join_frequency == 'every_hour' and not guild.voice_client:
+            guilds.append(guild)
+    await run_wave(guilds, slot, "Auto join wave", "hourly")
+
+async def timezone_wave(slot, guild_ids):
+    guilds = []
+    for guild_id in guild_ids:
+        guild = bot.get_guild(guild_id)
+        if guild and not is_server_blacklisted(guild.id) and not guild.voice_client:
+            guilds.append(guild)
+    await run_wave(guilds, slot, "Timezone wave", "timezone")
+
+async def run_wave(guilds, slot, label, wave_key):
+    """Join and play in every guild for a wave starting at slot (X:15), playing at X:20.
+
+    Progress is persisted under wave_key so that, after a restart, a catch-up
+    of the same slot skips guilds that already played and a completed wave is
+    not repeated.
+    """
+    if (wave_key, slot) in active_waves:
+        return
+    active_waves.add((wave_key, slot))
+    entry = wave_state.get(wave_key)
+    if not entry or entry["slot"] != slot.isoformat():
+        entry = {"slot": slot.isoformat(), "completed": False, "played": []}
+        wave_state[wave_key] = entry
+    save_wave_state()
+
+    def mark_played(guild_id):
+        entry["played"].append(guild_id)
+        skew = sync_start.skews.get(guild_id)
+        if skew is not None:
+            entry.setdefault("skew_ms", {})[str(guild_id)] = round(skew * 1000, 1)
+        save_wave_state()
+
+    play_at = slot + timedelta(minutes=5)
+    # Every guild in the wave, early or just in time, starts playing off this one deadline
+    sync_start = scheduling.SynchronizedStart.at(play_at)
+    early_guilds = []
+    just_in_time_guilds = []
+    for guild in guilds:
+        if guild.id in entry["played"]:
+            continue
+        if load_or_create_server_config(guild.id).get('join_mode', 'early') == 'just_in_time':
+            just_in_time_guilds.append(guild)
         else:
-            enabled_sounds = [s for s in available_sounds if server_config.get(f'sound_status_{s}', True)]
-            if not enabled_sounds:
-                enabled_sounds = available_sounds
-            sound_to_play = os.path.join(SOUND_FOLDER, random.choice(enabled_sounds))
-        if vc.is_playing():
-            logging.info(f"Already playing audio in {vc.channel.name} on {guild.name}.")
-            return
-        audio_source = discord.FFmpegPCMAudio(sound_to_play, executable=ffmpeg_path)
-        vc.play(audio_source)
-        sound_name = os.path.basename(sound_to_play).replace('.mp3', '')
-        await increment_sound_play_count(sound_name)
-        await increment_local_cheers_count(guild.id)
-        while vc.is_playing():
-            await asyncio.sleep(1)
-        await log_action(guild, "Playing Sound", f"Played **{os.path.basename(sound_to_play)}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.", user)
-        await asyncio.sleep(2)
-    except Exception as e:
-        logging.error(f"Error playing sound in {vc.channel.name if vc else 'unknown channel'} on {guild.name}: {e}")
+            early_guilds.append(guild)
+    try:
+        await asyncio.gather(
+            run_join_wave(early_guilds, play_at, sync_start, label, origin=slot, on_played=mark_played),
+            run_just_in_time_wave(just_in_time_guilds, play_at, sync_start, f"{label} (just in time)", on_played=mark_played)
+        )
+        entry["completed"] = True
+        save_wave_state()
+        if sync_start.skews:
+            logging.info(f"{label} for {play_at.strftime('%H:%M')} UTC playback skew: {sync_start.skew_summary()}")
     finally:
-        if vc:
-            await vc.disconnect()
-            await log_action(guild, "Left Voice Channel", f"Disconnected from **{vc.channel.name}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.", user)
-
-@tasks.loop(seconds=1)
-async def auto_join_task():
-    now = datetime.now(timezone.utc)
-    if now.minute == 15 and now.second == 0:
-        tasks = []
-        for guild in bot.guilds:
-            if is_server_blacklisted(guild.id):
-                continue
-            server_config = load_or_create_server_config(guild.id)
-            join_frequency = server_config.get('join_frequency', 'every_hour')
-            if join_frequency == 'every_hour' and not guild.voice_client:
-                tasks.append(schedule_join_and_play(guild))
-        if tasks:
-            await asyncio.gather(*tasks)
+        active_waves.discard((wave_key, slot))
 
-async def schedule_join_and_play(guild):
-    server_config = load_or_create_server_config(guild.id)
-    blacklist_channels = server_config.get("blacklist_channels", [])
-    voice_channel = max(
-        (vc for vc in guild.voice_channels if len(vc.members) > 0 and vc.id not in blacklist_channels),
-        key=lambda vc: len(vc.members),
-        default=None
-    )
-    if not voice_channel:
-        if debug_mode:
-            logging.info(f"No populated voice channels in {guild.name}")
+async def run_just_in_time_wave(guilds, play_at, sync_start, label, on_played=None):
+    if not guilds:
         return
-    vc = await join_voice_channel(guild, voice_channel, bot.user)
-    if not vc:
-        logging.error(f"Failed to join {voice_channel.name} in {guild.name}")
+    lead = get_just_in_time_lead_seconds(guilds)
+    connect_at = play_at - timedelta(seconds=lead)
+    if debug_mode:
+        logging.info(f"{label} for {len(guilds)} server(s) connects at {connect_at.strftime('%H:%M:%S')} UTC ({lead:.1f}s lead).")
+    await scheduling.sleep_until(connect_at)
+    await run_join_wave([guild for guild in guilds if not guild.voice_client], play_at, sync_start, label, on_played=on_played)
+
+async def run_join_wave(guilds, play_at, sync_start, label, origin=None, on_played=None):
+    jobs = []
+    sessions = []
+    for guild in guilds:
+        voice_channel = get_wave_voice_channel(guild)
+        busiest_channel = voice_channel or voice_occupancy.busiest_channel(guild)
+        if not busiest_channel:
+            if debug_mode:
+                logging.info(f"No populated voice channels in {guild.name}")
+            continue
+        if not voice_breaker.allows(guild.id):
+            if debug_mode:
+                logging.info(f"Skipping {guild.name} in {label}: backing off after failed voice joins")
+            continue
+        if not voice_channel:
+            # People are listening but the bot can't join any of their channels: count it like a failed join
+            problem = voice_permissions.describe_problem(busiest_channel) or f"Can't join {busiest_channel.name}"
+            logging.error(f"Can't join any populated voice channel in {guild.name}: {problem}")
+            await record_join_failure(guild, busiest_channel, discord.errors.ClientException(problem))
+            continue
+        session, status = await admit_voice_session(guild, "automatic", bot.user, voice_channel)
+        if status not in ("started", "reused"):
+            if debug_mode:
+                logging.info(f"Skipping {guild.name} in {label}: {describe_voice_admission(session, status)}")
+            continue
+        sessions.append(session)
+        jobs.append(scheduling.WaveJob(
+            guild.name, guild.shard_id, voice_occupancy.listeners(voice_channel),
+            lambda session=session, voice_channel=voice_channel: session.connect(voice_channel, raise_transient=True),
+            lambda vc, session=session: wait_and_play(session, sync_start, on_played),
+            not_before=get_spread_connect_time(guild, origin) if origin else None
+        ))
+    if not jobs:
         return
+    executor = create_wave_executor()
+    started = time.monotonic()
     try:
-        for _ in range(300):
-            if not vc.is_connected():
-                logging.error(f"Disconnected prematurely from {voice_channel.name} in {guild.name}")
-                return
-            await asyncio.sleep(1)
-        await play_sound_and_leave(guild, vc, bot.user, is_automatic=True)
-        if debug_mode:
-            logging.info(f"Incremented its_420_somewhere_count for {guild.name}")
-    except Exception as e:
-        logging.error(f"Error during wait or play in {guild.name}: {e}")
+        # Stop retrying a few seconds before X:20 so the last connects can settle
+        await executor.run(jobs, play_at - timedelta(seconds=3), origin)
     finally:
-        if vc and vc.is_connected():
-            await vc.disconnect()
-            await log_action(guild, "Left Voice Channel", f"Disconnected from **{voice_channel.name}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.", bot.user)
-
-async def join_and_play_420(guild):
-    server_config = load_or_create_server_config(guild.id)
-    blacklist_channels = server_config.get("blacklist_channels", [])
-    voice_channel = max(
-        (vc for vc in guild.voice_channels if len(vc.members) > 0 and vc.id not in blacklist_channels),
-        key=lambda vc: len(vc.members),
-        default=None
+        # Sessions whose connect was given up on never reached wait_and_play
+        for session in sessions:
+            await session.leave()
+    stats = executor.stats
+    logging.info(
+        f"{label} for {play_at.strftime('%H:%M')} UTC: {stats['connected']}/{stats['jobs']} connected, "
+        f"{stats['failed']} failed, {stats['retries']} retries in {time.monotonic() - started:.1f}s; "
+        f"connects {executor.histogram_summary()}"
     )
-    if not voice_channel:
-        logging.info(f"No populated voice channels in {guild.name}")
-        return
-    vc = None
+    if debug_mode:
+        histogram = ", ".join(f"+{second}s: {count}" for second, count in sorted(executor.histogram.items()))
+        logging.info(f"{label} connects per second: {histogram}")
+
+# Fires each job once per slot, sleeping until the slot instead of polling every second.
+# A wave that starts later than X:19 is skipped since it could no longer play at X:20.
+wave_scheduler = scheduling.Scheduler()
+wave_scheduler.add_job("auto join wave", scheduling.hourly_at(15), auto_join_wave, max_lateness=240)
+wave_scheduler.add_job("time log", scheduling.every_minutes(5), log_current_time, quiet=True)
+
+async def wait_and_play(session, sync_start, on_played=None):
+    guild = session.guild
+    audio_source = None
     try:
-        vc = await voice_channel.connect(reconnect=True)
-        await log_action(guild, "Joined Voice Channel", 
-                        f"Joined **{voice_channel.name}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.", bot.user)
-        await play_sound_and_leave(guild, vc, bot.user, is_automatic=True)
+        # Pick the sound and open its source while waiting, so starting playback at X:20 is just vc.play()
+        sound_to_play = choose_sound(guild)
+        if not sound_to_play:
+            return
+        audio_source = create_audio_source(sound_to_play)
+        while True:
+            # Read the clock once per pass so the delay can never go negative
+            remaining = sync_start.remaining()
+            if remaining <= 1:
+                break
+            if not session.vc.is_connected():
+                logging.error(f"Disconnected prematurely from {session.voice_channel.name} in {guild.name}")
+                return
+            await asyncio.sleep(max(0, min(1, remaining - 1)))
+        source, audio_source = audio_source, None  # The session cleans it up from here on
+        played = await session.play(sound_to_play=sound_to_play, audio_source=source, sync_start=sync_start)
+        if played and on_played:
+            on_played(guild.id)
+        if debug_mode:
+            logging.info(f"Played in {guild.name} {sync_start.skews.get(guild.id, 0) * 1000:.1f}ms after the wave's start time")
     except Exception as e:
-        logging.error(f"Error in {guild.name}: {e}")
+        logging.error(f"Error during wait or play in {guild.name}: {e}")
     finally:
-        if vc and vc.is_connected():
-            await vc.disconnect()
-            await log_action(guild, "Left Voice Channel", f"Disconnected from **{voice_channel.name}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.", bot.user)
-
-async def join_all_populated_voice_channels(guild):
+        if audio_source:
+            audio_source.cleanup()
+        await session.finish()
+
+VOICE_FAILURES_PATH = os.path.join(SERVER_LOG_DIR, "VoiceFailures.json")
+
+class VoiceCircuitBreaker:
+    """Consecutive voice join failures per guild, with exponential backoff and quarantine.
+
+    After each failure the guild's automatic joins are held off for
+    backoff_minutes * 2^(failures - 1). After quarantine_after consecutive
+    failures the guild is quarantined: no automatic joins until a join
+    succeeds (e.g. a manual /cheers) or a developer resets it. Entries are
+    persisted through the state writer so restarts keep the backoff.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.guilds = state_writer.read_json(path, {})  # guild ID (str) -> failure entry
+
+    def save(self):
+        state_writer.write_json(self.path, self.guilds)
+
+    def allows(self, guild_id):
+        entry = self.guilds.get(str(guild_id))
+        if not entry:
+            return True
+        if entry["quarantined"]:
+            return False
+        return datetime.now(timezone.utc) >= datetime.fromisoformat(entry["retry_after"])
+
+    def record_success(self, guild_id):
+        if self.guilds.pop(str(guild_id), None):
+            self.save()
+
+    def record_failure(self, guild_id, channel_name, error, backoff_minutes, quarantine_after):
+        """Count a failed join. Returns True if this failure put the guild into quarantine."""
+        now = datetime.now(timezone.utc)
+        entry = self.guilds.setdefault(str(guild_id), {"failures": 0, "quarantined": False})
+        entry["failures"] += 1
+        entry["channel"] = channel_name
+        entry["error"] = str(error)
+        entry["last_failure"] = now.isoformat()
+        entry["retry_after"] = (now + timedelta(minutes=backoff_minutes * 2 ** (entry["failures"] - 1))).isoformat()
+        newly_quarantined = not entry["quarantined"] and entry["failures"] >= quarantine_after
+        if newly_quarantined:
+            entry["quarantined"] = True
+        self.save()
+        return newly_quarantined
+
+    def reset(self, guild_id=None):
+        """Clear one guild's failures, or every guild's. Returns the IDs that were cleared."""
+        if guild_id is None:
+            cleared = list(self.guilds)
+            self.guilds.clear()
+        else:
+            cleared = [str(guild_id)] if self.guilds.pop(str(guild_id), None) else []
+        if cleared:
+            self.save()
+        return cleared
+
+    def quarantined(self):
+        return {guild_id: entry for guild_id, entry in self.guilds.items() if entry["quarantined"]}
+
+voice_breaker = VoiceCircuitBreaker(VOICE_FAILURES_PATH)
+
+async def record_join_failure(guild, voice_channel, e):
+    global_config = bot.global_config
+    if voice_breaker.record_failure(
+        guild.id, voice_channel.name, e,
+        global_config.get("voice_failure_backoff_minutes", 50),
+        global_config.get("voice_failure_quarantine_after", 3)
+    ):
+        logging.warning(f"Quarantined {guild.name} after {voice_breaker.guilds[str(guild.id)]['failures']} failed voice joins: {e}")
+        await notify_join_failure(guild, voice_channel, e)
+
+async def notify_join_failure(guild, voice_channel, e):
+    """Tell the guild, once per quarantine, that automatic joins are paused."""
+    failures = voice_breaker.guilds[str(guild.id)]["failures"]
     server_config = load_or_create_server_config(guild.id)
-    blacklist_channels = server_config.get("blacklist_channels", [])
-    voice_channel = max(
-        (vc for vc in guild.voice_channels if len(vc.members) > 0 and vc.id not in blacklist_channels),
-        key=lambda vc: len(vc.members),
-        default=None
+    log_channel_id = server_config.get('log_channel_id')
+    log_channel = bot.get_channel(log_channel_id) if log_channel_id else None
+    developer_id = bot.global_config.primary_developer_id
+    message = (
+        f"Hey! I've failed to join a voice channel here {failures} times in a row, most recently {voice_channel.name}. "
+        f"Error: {str(e)}. I've paused the automatic cheers for this server so I stop retrying every hour. "
+        f"Please ensure I have 'Connect' and 'Speak' permissions, or use /blacklist to exclude the channel, then use /cheers once to turn them back on. "
+        f"Pinging the dev (If he's in this server..) <@{developer_id}> "
+        f"You are free to ignore/report this message to <@{developer_id}> by **__directly messaging the bot.__**"
     )
-    if voice_channel:
-        if guild.voice_client and guild.voice_client.is_connected():
-            logging.info(f"Bot is already in a voice channel in {guild.name}.")
-        else:
-            logging.info(f"Scheduling join for {voice_channel.name} in {guild.name}...")
-            await join_voice_channel(guild, voice_channel, bot.user)
-    else:
-        if debug_mode:
-            logging.info(f"No valid voice channels to join in {guild.name}. Skipping join action.")
-
-async def play_sound_in_all_channels(guild):
-    if guild.voice_client and guild.voice_client.is_connected():
-        await play_sound_and_leave(guild, guild.voice_client, bot.user, is_automatic=True)
-
-async def join_voice_channel(guild, voice_channel, user):
-    vc = None
     try:
-        if guild.voice_client and guild.voice_client.is_connected():
-            if guild.voice_client.channel == voice_channel:
-                logging.info(f"Already connected to {voice_channel.name} in {guild.name}")
-                return guild.voice_client
-            else:
-                await guild.voice_client.disconnect()
-        vc = await voice_channel.connect(reconnect=True)
-        logging.info(f"Joined {voice_channel.name} in {guild.name} at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC")
-        await log_action(
-            guild, "Joined Voice Channel",
-            f"Joined **{voice_channel.name}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.",
-            user
-        )
-    except discord.errors.ClientException as e:
-        logging.error(f"Failed to join {voice_channel.name} in {guild.name}: {e}")
-        server_config = load_or_create_server_config(guild.id)
-        admin_roles = server_config.get('admin_roles', [])
-        log_channel_id = server_config.get('log_channel_id')
-        log_channel = bot.get_channel(log_channel_id) if log_channel_id else None
-        with open(config_path, 'r') as f:
-            global_config = json.load(f)
-        developer_id = global_config.get("bot_developer_ids", [])[0]
-        message = (
-            f"Hey! I tried to join the most populated voice channel {voice_channel.name} but didn't have permission to. "
-            f"Error: {str(e)}. Please ensure I have 'Connect' and 'Speak' permissions, or use /blacklist to exclude this channel. "
-            f"Pinging the dev (If he's in this server..) <@{developer_id}> "
-            f"You are free to ignore/report this message to <@{developer_id}> by **__directly messaging the bot.__**"
-        )
         if log_channel and log_channel.permissions_for(guild.me).send_messages:
             await log_channel.send(message)
         else:
@@ -1138,19 +1872,11 @@ async def join_voice_channel(guild, voice_channel, user):
                 if text_channel.permissions_for(guild.me).send_messages:
                     await text_channel.send(message)
                     break
-        return None
-    except discord.errors.ConnectionClosed as e:
-        logging.error(f"Connection closed while joining {voice_channel.name} in {guild.name}: {e}")
-        return None
-    except Exception as e:
-        logging.error(f"Unexpected error joining {voice_channel.name} in {guild.name}: {e}")
-        return None
-    return vc
+    except discord.HTTPException as error:
+        logging.error(f"Could not send the voice quarantine notice in {guild.name}: {error}")
 
-async def play_sound_and_leave(guild, vc, user, is_automatic=False):
-    if not vc or not vc.is_connected():
-        logging.error(f"Voice client invalid or disconnected in {guild.name}")
-        return
+def choose_sound(guild):
+    """Path of the sound to play in guild under its mode, or None if the file is missing."""
     server_config = load_or_create_server_config(guild.id)
     mode = server_config.get("mode", "single")
     default_sound = server_config.get("default_sound", "Cheers_Bitch.mp3")
@@ -1171,50 +1897,331 @@ async def play_sound_and_leave(guild, vc, user, is_automatic=False):
         sound_to_play = os.path.join(SOUND_FOLDER, random.choice(enabled_sounds))
     if not os.path.exists(sound_to_play):
         logging.error(f"Sound file not found: {sound_to_play}")
-        return
-    audio_source = None
-    try:
-        if not os.path.exists(ffmpeg_path):
-            logging.error(f"FFmpeg not found at: {ffmpeg_path}")
-            return
-        if vc.is_playing():
-            logging.info(f"Already playing audio in {vc.channel.name} on {guild.name}")
-            return
-        audio_source = discord.FFmpegPCMAudio(sound_to_play, executable=ffmpeg_path)
-        vc.play(audio_source)
-        logging.info(f"Started playing {sound_to_play} in {guild.name} | {vc.channel.name} at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC")
-        while vc.is_playing():
-            await asyncio.sleep(1)
-        sound_name = os.path.basename(sound_to_play).replace('.mp3', '')
-        await increment_sound_play_count(sound_name)
-        await increment_local_cheers_count(guild.id)
-        if is_automatic:
-            await increment_420_somewhere_count(1)
+        return None
+    return sound_to_play
+
+# Guild ID -> the VoiceSession that currently owns the guild's voice connection
+voice_sessions = {}
+# Voice session phase -> recent time spent in it, across all guilds
+voice_phase_latency = {}
+
+# Guild ID -> trigger of the latest session there, to attribute voice clients left behind
+last_voice_trigger = {}
+# Voice connections the reaper had to clean up, by "trigger/state" of the code path that leaked them
+voice_leaks = Counter()
+# Guild ID -> when a voice client without a session was first seen there
+orphaned_since = {}
+
+# Requests that can be queued on an active session to play again before it leaves
+VOICE_ENCORE_LIMIT = 3
+VOICE_TRIGGER_LABELS = {
+    "automatic": "the scheduled cheers",
+    "manual": "/cheers",
+    "join": "/join",
+    "test": "a test run"
+}
+
+async def admit_voice_session(guild, trigger, user, voice_channel=None, merge=False):
+    """Decide how a voice trigger may use guild's voice connection. Returns (session, status).
+
+    "started": a new session; the caller connects, plays, and finishes it.
+    "reused": the session only holding the connection after /join, handed over to the caller.
+    "merged": queued on the active session in the same channel, which plays it again before leaving.
+    /join sessions still connecting are never merged into, since they don't finish().
+    "busy" / "queue_full": rejected; session is the active one, for describe_voice_admission().
+    A session that is already leaving is waited for, so connections never overlap.
+    """
+    session = voice_sessions.get(guild.id)
+    while session and session.state == VoiceSession.LEAVING:
+        await session.closed.wait()
+        session = voice_sessions.get(guild.id)
+    if not session:
+        session = VoiceSession(guild, trigger, user)
+        voice_sessions[guild.id] = session
+        last_voice_trigger[guild.id] = trigger
+        return session, "started"
+    if session.trigger == "join" and session.state == VoiceSession.READY:
+        session.trigger, session.user = trigger, user
+        last_voice_trigger[guild.id] = trigger
+        return session, "reused"
+    # A /join session never calls finish(), so anything queued on it would never play
+    if merge and session.trigger != "join" and (voice_channel is None or session.voice_channel == voice_channel):
+        if len(session.encores) >= VOICE_ENCORE_LIMIT:
+            return session, "queue_full"
+        session.encores.append((trigger, user))
+        return session, "merged"
+    logging.info(f"Voice session in {guild.name} is busy ({session.trigger}, {session.state}); rejected {trigger}.")
+    return session, "busy"
+
+def describe_voice_admission(session, status):
+    channel = f"**{session.voice_channel.name}**" if session.voice_channel else "a voice channel"
+    if status == "merged":
+        return f"CheersBot is already in {channel}, so it will play your cheers again before it leaves."
+    if status == "queue_full":
+        return f"CheersBot already has {len(session.encores)} cheers queued in {channel}. Please try again once it leaves."
+    return (
+        f"CheersBot is busy with {VOICE_TRIGGER_LABELS.get(session.trigger, session.trigger)} in {channel} "
+        f"({session.state}). Please try again once it leaves."
+    )
+
+class VoiceSession:
+    """One guild's voice connection, from connecting through playing to leaving.
+
+    Every voice trigger (the waves, /cheers, /join, /test) goes through a
+    session: idle -> connecting -> ready -> playing -> ready -> leaving -> idle.
+    At most one session per guild is registered in voice_sessions (see
+    admit_voice_session), an existing connection is reused instead of
+    reconnecting, and leave() disconnects and logs exactly once. Requests
+    merged into the session are queued in encores and played by finish().
+    The time spent in each phase is recorded once.
+    """
+
+    IDLE = "idle"
+    CONNECTING = "connecting"
+    READY = "ready"
+    PLAYING = "playing"
+    LEAVING = "leaving"
+
+    def __init__(self, guild, trigger, user):
+        self.guild = guild
+        self.trigger = trigger
+        self.user = user
+        self.vc = None
+        self.voice_channel = None
+        self.state = self.IDLE
+        self.phase_started = time.monotonic()
+        self.encores = []  # (trigger, user) requests merged into this session
+        self.closed = asyncio.Event()
+
+    def enter(self, state):
+        now = time.monotonic()
+        elapsed = now - self.phase_started
+        if self.state != self.IDLE:
+            voice_phase_latency.setdefault(self.state, scheduling.LatencyTracker()).record(elapsed)
             if debug_mode:
-                logging.info(f"Incremented its_420_somewhere_count for {guild.name}")
-        logging.info(f"Finished playing {sound_to_play} in {guild.name} | {vc.channel.name} at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC")
-        await log_action(
-            guild, "Playing Sound",
-            f"Played **{os.path.basename(sound_to_play)}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.",
-            user
-        )
-        await asyncio.sleep(2)
-    except discord.errors.ClientException as e:
-        logging.error(f"Client error playing sound in {vc.channel.name} on {guild.name}: {e}")
-    except Exception as e:
-        logging.error(f"Error playing sound in {vc.channel.name} on {guild.name}: {e}")
-        if "ffmpeg" in str(e).lower():
-            logging.error(f"FFmpeg-specific error: {e}")
-    finally:
-        if vc and vc.is_connected():
-            await vc.disconnect()
+                logging.info(f"Voice session in {self.guild.name} ({self.trigger}): {self.state} took {elapsed:.2f}s")
+        self.state = state
+        self.phase_started = now
+
+    async def connect(self, voice_channel, raise_transient=False):
+        """Connect to voice_channel, reusing or moving an existing connection. Returns the voice client or None."""
+        guild = self.guild
+        self.voice_channel = voice_channel
+        if self.state != self.CONNECTING:
+            self.enter(self.CONNECTING)
+        try:
+            vc = guild.voice_client
+            if not (vc and vc.is_connected() and vc.channel == voice_channel):
+                # Fail fast instead of waiting for Discord to refuse the connect
+                problem = voice_permissions.describe_problem(voice_channel)
+                if problem:
+                    raise discord.errors.ClientException(problem)
+            if vc and vc.is_connected():
+                if vc.channel == voice_channel:
+                    logging.info(f"Already connected to {voice_channel.name} in {guild.name}")
+                else:
+                    await vc.move_to(voice_channel)
+                    logging.info(f"Moved to {voice_channel.name} in {guild.name}")
+            else:
+                vc = await voice_channel.connect(reconnect=True)
+                logging.info(f"Joined {voice_channel.name} in {guild.name} at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC")
+        except discord.errors.ClientException as e:
+            logging.error(f"Failed to join {voice_channel.name} in {guild.name}: {e}")
+            await record_join_failure(guild, voice_channel, e)
+            await self.leave()
+            return None
+        except (discord.errors.ConnectionClosed, asyncio.TimeoutError) as e:
+            if raise_transient:
+                raise
+            logging.error(f"Connection closed or timed out while joining {voice_channel.name} in {guild.name}: {e}")
+            await self.leave()
+            return None
+        except Exception as e:
+            logging.error(f"Unexpected error joining {voice_channel.name} in {guild.name}: {e}")
+            await record_join_failure(guild, voice_channel, e)
+            await self.leave()
+            return None
+        voice_breaker.record_success(guild.id)
+        self.vc = vc
+        self.enter(self.READY)
+        # Outside the connect handling: a log channel the bot can't post in is not a failed join
+        try:
             await log_action(
-                guild, "Left Voice Channel",
-                f"Disconnected from **{vc.channel.name}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.",
-                user
+                guild, "Manual Join" if self.trigger == "join" else "Joined Voice Channel",
+                f"Joined **{voice_channel.name}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.",
+                self.user
             )
-        if audio_source:
-            audio_source.cleanup()
+        except discord.HTTPException as e:
+            logging.error(f"Could not log the voice join in {guild.name}: {e}")
+        return vc
+
+    async def play(self, sound_to_play=None, audio_source=None, sync_start=None):
+        """Play a sound and count it. Returns True if the sound was played.
+
+        A sound and audio source prepared in advance can be passed in; with
+        sync_start, playback starts at that shared deadline instead of right away.
+        """
+        guild, vc = self.guild, self.vc
+        played = False
+        try:
+            if not vc or not vc.is_connected():
+                logging.error(f"Voice client invalid or disconnected in {guild.name}")
+                return played
+            if not sound_to_play:
+                sound_to_play = choose_sound(guild)
+                if not sound_to_play:
+                    return played
+            if not audio_source and not os.path.exists(ffmpeg_path):
+                logging.error(f"FFmpeg not found at: {ffmpeg_path}")
+                return played
+            if vc.is_playing():
+                logging.info(f"Already playing audio in {vc.channel.name} on {guild.name}")
+                return played
+            if not audio_source:
+                audio_source = create_audio_source(sound_to_play)
+            listeners = count_listeners(vc.channel)
+            finished = None
+
+            def start():
+                nonlocal finished
+                finished = start_playback(vc, audio_source)
+
+            if sync_start:
+                await sync_start.start(guild.id, start)
+            else:
+                start()
+            self.enter(self.PLAYING)
+            started_at = time.time()
+            played = True
+            logging.info(f"Started playing {sound_to_play} in {guild.name} | {vc.channel.name} at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC")
+            error = await wait_for_playback(vc, finished, get_playback_timeout(sound_to_play, audio_source))
+            if error:
+                logging.error(f"Player error while playing {sound_to_play} in {guild.name} | {vc.channel.name}: {error}")
+            sound_name = os.path.basename(sound_to_play).replace('.mp3', '')
+            increment_sound_play_count(sound_name)
+            await increment_local_cheers_count(guild.id)
+            record_play_event(guild, vc.channel, sound_name, self.trigger, listeners, started_at)
+            if self.trigger == "automatic":
+                increment_420_somewhere_count(1)
+                if debug_mode:
+                    logging.info(f"Incremented its_420_somewhere_count for {guild.name}")
+            elif self.trigger == "manual":
+                increment_manual_smoke_seshes_count()
+            logging.info(f"Finished playing {sound_to_play} in {guild.name} | {vc.channel.name} at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC")
+            await log_action(
+                guild, "Playing Sound",
+                f"Played **{os.path.basename(sound_to_play)}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.",
+                self.user
+            )
+        except discord.errors.ClientException as e:
+            logging.error(f"Client error playing sound in {vc.channel.name} on {guild.name}: {e}")
+        except Exception as e:
+            logging.error(f"Error playing sound in {vc.channel.name if vc else 'unknown channel'} on {guild.name}: {e}")
+            if "ffmpeg" in str(e).lower():
+                logging.error(f"FFmpeg-specific error: {e}")
+        finally:
+            if self.state == self.PLAYING:
+                self.enter(self.READY)
+            if audio_source:
+                audio_source.cleanup()
+        return played
+
+    async def leave(self, action="Left Voice Channel", user=None):
+        """Disconnect (if connected) and end the session. Safe to call more than once."""
+        if self.state == self.LEAVING or self.closed.is_set():
+            await self.closed.wait()
+            return
+        self.enter(self.LEAVING)
+        vc = self.vc or self.guild.voice_client
+        try:
+            if vc and vc.is_connected():
+                channel_name = vc.channel.name
+                await vc.disconnect()
+                await log_action(
+                    self.guild, action,
+                    f"Disconnected from **{channel_name}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.",
+                    user or self.user
+                )
+        except Exception as e:
+            logging.error(f"Error leaving the voice channel in {self.guild.name}: {e}")
+        finally:
+            if voice_sessions.get(self.guild.id) is self:
+                del voice_sessions[self.guild.id]
+            self.enter(self.IDLE)
+            self.closed.set()
+
+    async def finish(self):
+        """Play any merged requests, then leave."""
+        try:
+            while self.encores and self.vc and self.vc.is_connected():
+                self.trigger, self.user = self.encores.pop(0)
+                await self.play()
+        finally:
+            await self.leave()
+
+    async def play_and_finish(self, **kwargs):
+        try:
+            return await self.play(**kwargs)
+        finally:
+            await self.finish()
+
+    def abandon(self):
+        """Drop a session whose leave() is stuck, leaving its voice client to the reaper."""
+        if voice_sessions.get(self.guild.id) is self:
+            del voice_sessions[self.guild.id]
+        self.closed.set()
+
+def get_voice_idle_limit(session):
+    """Seconds a session may stay in one phase before the reaper ends it, or None for no limit.
+
+    Sessions holding a connection after /join get their own, longer limit (0 disables it).
+    """
+    global_config = bot.global_config
+    if session.trigger == "join" and session.state == VoiceSession.READY:
+        return global_config.get("voice_join_idle_timeout_seconds", 0) or None
+    return global_config.get("voice_idle_timeout_seconds", 600)
+
+def count_voice_leak(guild, path, detail):
+    voice_leaks[path] += 1
+    logging.warning(f"Reaping voice connection in {guild.name} ({detail}); leaks from {path} so far: {voice_leaks[path]}")
+
+@tasks.loop(seconds=60)
+async def reap_voice_clients_task():
+    """Disconnect voice clients that no session owns any more and sessions stuck in one phase."""
+    now = time.monotonic()
+    for session in list(voice_sessions.values()):
+        limit = get_voice_idle_limit(session)
+        idle = now - session.phase_started
+        if not limit or idle <= limit:
+            continue
+        count_voice_leak(session.guild, f"{session.trigger}/{session.state}", f"{session.state} for {idle:.0f}s")
+        if session.state == VoiceSession.LEAVING:
+            session.abandon()
+            continue
+        try:
+            await asyncio.wait_for(session.leave(), timeout=30)
+        except asyncio.TimeoutError:
+            session.abandon()
+    grace = bot.global_config.get("voice_orphan_grace_seconds", 60)
+    connected_guild_ids = set()
+    for vc in list(bot.voice_clients):
+        guild = vc.guild
+        connected_guild_ids.add(guild.id)
+        if guild.id in voice_sessions:
+            orphaned_since.pop(guild.id, None)
+            continue
+        first_seen = orphaned_since.setdefault(guild.id, now)
+        if now - first_seen < grace:
+            continue
+        count_voice_leak(guild, f"{last_voice_trigger.get(guild.id, 'untracked')}/orphaned", f"no session for {now - first_seen:.0f}s")
+        orphaned_since.pop(guild.id, None)
+        try:
+            await vc.disconnect(force=True)
+        except Exception as e:
+            logging.error(f"Error disconnecting orphaned voice client in {guild.name}: {e}")
+    for guild_id in list(orphaned_since):
+        if guild_id not in connected_guild_ids:
+            del orphaned_since[guild_id]
 
 @bot.tree.command(name="server-blacklist", description="Manage the server blacklist. Restricted to developers.")
 @app_commands.describe(action="Action to perform: add, remove, or list", server_id="Server ID to add or remove")
@@ -1223,7 +2230,6 @@ async def server_blacklist(interaction: discord.Interaction, action: str, server
         await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
         return
 
-    blacklisted_servers = load_blacklisted_servers()
     action = action.lower()
 
     if action == "add":
@@ -1234,7 +2240,7 @@ async def server_blacklist(interaction: discord.Interaction, action: str, server
         if not guild:
             await interaction.response.send_message("Invalid server ID or bot is not in the server.", ephemeral=True)
             return
-        if any(server['id'] == server_id for server in blacklisted_servers):
+        if guild.id in blacklist_index:
             await interaction.response.send_message(f"Server {server_id} is already blacklisted.", ephemeral=True)
             return
         await interaction.response.send_message("Please provide a reason for blacklisting the server:", ephemeral=True)
@@ -1243,8 +2249,7 @@ async def server_blacklist(interaction: discord.Interaction, action: str, server
         try:
             reason_msg = await bot.wait_for('message', timeout=60.0, check=check_message)
             reason = reason_msg.content.strip()
-            blacklisted_servers.append({"id": server_id, "reason": reason})
-            save_blacklisted_servers(blacklisted_servers)
+            blacklist_index.add(guild.id, reason)
             await interaction.followup.send(f"Server {server_id} has been blacklisted. Reason: {reason}", ephemeral=True)
             await reason_msg.delete()
         except asyncio.TimeoutError:
@@ -1254,20 +2259,17 @@ async def server_blacklist(interaction: discord.Interaction, action: str, server
         if not server_id:
             await interaction.response.send_message("Please provide a server ID.", ephemeral=True)
             return
-        for server in blacklisted_servers:
-            if server['id'] == server_id:
-                blacklisted_servers.remove(server)
-                save_blacklisted_servers(blacklisted_servers)
-                await interaction.response.send_message(f"Server {server_id} has been removed from the blacklist.", ephemeral=True)
-                return
+        if server_id.isdigit() and blacklist_index.remove(server_id):
+            await interaction.response.send_message(f"Server {server_id} has been removed from the blacklist.", ephemeral=True)
+            return
         await interaction.response.send_message(f"Server {server_id} is not blacklisted.", ephemeral=True)
 
     elif action == "list":
-        if not blacklisted_servers:
+        if not blacklist_index:
             await interaction.response.send_message("No servers are currently blacklisted.", ephemeral=True)
             return
         embed = discord.Embed(title="Blacklisted Servers", color=discord.Color.red())
-        for server in blacklisted_servers:
+        for server in blacklist_index.entries():
             guild = bot.get_guild(int(server['id']))
             name = guild.name if guild else f"Unknown (ID: {server['id']})"
             embed.add_field(name=name, value=f"Reason: {server['reason']}", inline=False)
@@ -1396,13 +2398,9 @@ async def setup(interaction: discord.Interaction, channel: discord.TextChannel):
         })
         await save_config(interaction.guild.id, server_config)
 
-        # Load global config settings for embed
-        with open(config_path, 'r') as f:
-            global_config = json.load(f)
-
-        log_settings = global_config.get("log_settings", {})
-        footer_text = log_settings.get("footer_text", "CheersBot V2.0 by HomiesHouse | Discord.gg/HomiesHouse")
-        footer_icon_url = log_settings.get("footer_icon_url", "https://i.imgur.com/4OO5wh0.png")
+        # Global config settings for embed
+        footer_text = bot.global_config.footer_text
+        footer_icon_url = bot.global_config.footer_icon_url
         guild_icon_url = interaction.guild.icon.url if interaction.guild.icon else footer_icon_url
 
         # Confirmation Embed
@@ -1453,22 +2451,15 @@ async def join(interaction: discord.Interaction, channel: discord.VoiceChannel):
         return
     if not await ensure_setup(interaction):
         return
-    try:
-        vc = await channel.connect()
-        await interaction.response.send_message(f"Joined {channel.name} successfully!")
-
-        # Call log_action once with correct timestamp
-        await log_action(
-            interaction.guild,
-            "Manual Join",
-            f"Manually joined **{channel.name}** at {datetime.now(timezone.utc).strftime('%H:%M:%S')} UTC.",
-            interaction.user
-        )
-    except Exception as e:
-        if not interaction.response.is_done():
-            await interaction.response.send_message(f"Failed to join: {e}", ephemeral=True)
-        else:
-            print(f"Error during /join command: {e}")
+    session, status = await admit_voice_session(interaction.guild, "join", interaction.user, channel)
+    if status not in ("started", "reused"):
+        await interaction.response.send_message(describe_voice_admission(session, status), ephemeral=True)
+        return
+    await interaction.response.defer()
+    if await session.connect(channel):
+        await interaction.followup.send(f"Joined {channel.name} successfully!")
+    else:
+        await interaction.followup.send(f"Failed to join {channel.name}.", ephemeral=True)
 
 @bot.tree.command(name="leave", description="Make the bot leave the voice channel.")
 async def leave(interaction: discord.Interaction):
@@ -1477,7 +2468,11 @@ async def leave(interaction: discord.Interaction):
         return
     if not await ensure_setup(interaction):
         return
-    if interaction.guild.voice_client:
+    session = voice_sessions.get(interaction.guild.id)
+    if session:
+        await interaction.response.send_message("Left the voice channel.")
+        await session.leave(action="Manual Leave", user=interaction.user)
+    elif interaction.guild.voice_client:
         await interaction.guild.voice_client.disconnect()
         await interaction.response.send_message("Left the voice channel.")
 
@@ -1503,7 +2498,7 @@ class SoundButton(ui.Button):
         self.server_config[f"sound_status_{self.sound}"] = not current_status
 
         # Save updated config
-        save_config(interaction.guild.id, self.server_config)
+        await save_config(interaction.guild.id, self.server_config)
 
         # Update button color and text
         self.style = ButtonStyle.green if not current_status else ButtonStyle.red
@@ -1518,7 +2513,7 @@ class SingleSoundButton(ui.Button):
     async def callback(self, interaction: Interaction):
         # Set the selected sound as the default sound
         self.server_config['default_sound'] = self.sound
-        save_config(interaction.guild.id, self.server_config)
+        await save_config(interaction.guild.id, self.server_config)
         await interaction.response.send_message(f"Default sound set to: {self.sound}", ephemeral=True)
 
 class SoundMenuView(ui.View):
@@ -1698,7 +2693,10 @@ async def mode(interaction: discord.Interaction, mode: str):
     if mode == "single":
         class SingleSoundSelect(ui.Select):
             def __init__(self, sounds, config):
-                options = [discord.SelectOption(label=sound.replace('.mp3', ''), value=sound) for sound in sounds]
+                options = [
+                    discord.SelectOption(label=sound.replace('.mp3', ''), value=sound, description=describe_sound(sound))
+                    for sound in sounds
+                ]
                 super().__init__(placeholder="Choose a single sound...", min_values=1, max_values=1, options=options)
                 self.config = config
 
@@ -1750,7 +2748,8 @@ async def reload(interaction: discord.Interaction):
     try:
         # Reload global config first
         await reload_global_config()
-        logging.info("Global config reloaded.")
+        blacklist_index.load()
+        logging.info("Global config and server blacklist reloaded.")
 
         # Reload command modules
         commands_dir = os.path.join(BASE_DIR, 'commands')
@@ -1781,6 +2780,129 @@ async def reload(interaction: discord.Interaction):
         logging.error(f"Error during reload: {e}")
         await interaction.followup.send(f"Failed to reload commands: {e}", ephemeral=True)
 
+@bot.tree.command(name="voice-quarantine", description="List or reset servers whose voice joins keep failing. Developer only.")
+@app_commands.describe(action="Action to perform: list or reset", server_id="Server ID to reset (all servers if omitted)")
+async def voice_quarantine(interaction: discord.Interaction, action: str, server_id: str = None):
+    if not is_developer(interaction):
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+
+    action = action.lower()
+
+    if action == "list":
+        if not voice_breaker.guilds:
+            await interaction.response.send_message("No servers are backing off or quarantined.", ephemeral=True)
+            return
+        embed = discord.Embed(title="Voice Join Failures", color=discord.Color.red())
+        # Quarantined servers first, then the ones still backing off
+        entries = sorted(voice_breaker.guilds.items(), key=lambda item: (not item[1]["quarantined"], -item[1]["failures"]))
+        for guild_id, entry in entries[:25]:
+            guild = bot.get_guild(int(guild_id))
+            name = guild.name if guild else f"Unknown (ID: {guild_id})"
+            status = "Quarantined" if entry["quarantined"] else f"Backing off until {datetime.fromisoformat(entry['retry_after']).strftime('%H:%M')} UTC"
+            embed.add_field(
+                name=f"{name} ({guild_id})",
+                value=f"{status}\nFailures: {entry['failures']} | Channel: {entry['channel']}\nError: {entry['error'][:200]}",
+                inline=False
+            )
+        if len(entries) > 25:
+            embed.set_footer(text=f"Showing 25 of {len(entries)} servers")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    elif action == "reset":
+        if server_id and not server_id.isdigit():
+            await interaction.response.send_message("Please provide a valid server ID.", ephemeral=True)
+            return
+        cleared = voice_breaker.reset(server_id)
+        if not cleared:
+            await interaction.response.send_message(f"Server {server_id} has no recorded voice join failures.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"Reset voice join failures for {len(cleared)} server(s).", ephemeral=True)
+
+    else:
+        await interaction.response.send_message("Invalid action. Please use 'list' or 'reset'.", ephemeral=True)
+
+@bot.tree.command(name="config-cache", description="Show server config cache statistics. Developer only.")
+async def config_cache(interaction: discord.Interaction):
+    if not is_developer(interaction):
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+
+    hits = config_cache_stats["hits"]
+    misses = config_cache_stats["misses"]
+    lookups = hits + misses
+    hit_rate = f"{hits / lookups * 100:.1f}%" if lookups else "N/A"
+
+    embed = discord.Embed(title="Server Config Cache", color=discord.Color.blue())
+    embed.add_field(name="Cached Configs", value=f"`{len(server_config_cache)}`", inline=True)
+    embed.add_field(name="Hits", value=f"`{hits}`", inline=True)
+    embed.add_field(name="Misses", value=f"`{misses}`", inline=True)
+    embed.add_field(name="Hit Rate", value=f"`{hit_rate}`", inline=True)
+    embed.add_field(name="Invalidations", value=f"`{config_cache_stats['invalidations']}`", inline=True)
+    embed.add_field(
+        name="State Writer",
+        value=(
+            f"Pending: `{len(state_writer.pending)}` | Flushes: `{state_writer.stats['flushes']}` | "
+            f"Writes: `{state_writer.stats['writes']}` | Coalesced: `{state_writer.stats['coalesced']}` | "
+            f"Errors: `{state_writer.stats['errors']}`"
+        ),
+        inline=False
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="join-mode", description="Choose when the bot connects before the X:20 cheers.")
+@app_commands.describe(join_mode="Early joins at X:15; just-in-time joins seconds before X:20.")
+@app_commands.choices(join_mode=[
+    app_commands.Choice(name="Early (X:15)", value="early"),
+    app_commands.Choice(name="Just in time", value="just_in_time")
+])
+async def join_mode(interaction: discord.Interaction, join_mode: str):
+    if is_server_blacklisted(interaction.guild.id):
+        await handle_blacklisted_server(interaction)
+        return
+    if not await ensure_setup(interaction):
+        return
+    if not check_admin_or_developer(interaction):
+        await interaction.response.send_message("You do not have permission to use this command. Only bot administrators and developers can use /join-mode.", ephemeral=True)
+        return
+    server_config = load_or_create_server_config(interaction.guild.id)
+    server_config['join_mode'] = join_mode
+    await save_config(interaction.guild.id, server_config)
+    if join_mode == 'just_in_time':
+        message = "CheersBot will now connect just before X:20 instead of waiting in the voice channel from X:15."
+    else:
+        message = "CheersBot will now connect at X:15 and wait in the voice channel until X:20."
+    await interaction.response.send_message(message, ephemeral=True)
+
+@bot.tree.command(name="listener-filter", description="Choose which voice channel members count as listeners.")
+@app_commands.describe(
+    ignore_bots="Don't count bots (e.g. music bots) as listeners.",
+    ignore_afk_channel="Never join the server's AFK channel.",
+    ignore_self_deafened="Don't count members who have deafened themselves."
+)
+async def listener_filter(interaction: discord.Interaction, ignore_bots: bool = None, ignore_afk_channel: bool = None, ignore_self_deafened: bool = None):
+    if is_server_blacklisted(interaction.guild.id):
+        await handle_blacklisted_server(interaction)
+        return
+    if not await ensure_setup(interaction):
+        return
+    if not check_admin_or_developer(interaction):
+        await interaction.response.send_message("You do not have permission to use this command. Only bot administrators and developers can use /listener-filter.", ephemeral=True)
+        return
+    server_config = load_or_create_server_config(interaction.guild.id)
+    changes = {"ignore_bots": ignore_bots, "ignore_afk_channel": ignore_afk_channel, "ignore_self_deafened": ignore_self_deafened}
+    changes = {key: value for key, value in changes.items() if value is not None}
+    if changes:
+        server_config.update(changes)
+        await save_config(interaction.guild.id, server_config)
+    current = get_listener_filter(server_config)
+    message = "\n".join(f"{key.replace('_', ' ').capitalize()}: {'Yes' if value else 'No'}" for key, value in current.items())
+    await interaction.response.send_message(
+        f"{'Listener filter updated.' if changes else 'Current listener filter:'}\n{message}\n"
+        f"CheersBot only joins voice channels with at least one member who passes this filter.",
+        ephemeral=True
+    )
+
 @bot.tree.command(name="setup-info", description="Display the current bot settings for this server.")
 async def setup_info(interaction: discord.Interaction):
     if is_server_blacklisted(interaction.guild.id):
@@ -1811,6 +2933,9 @@ async def setup_info(interaction: discord.Interaction):
     if mode == 'single':
         embed.add_field(name="Sound", value=sound, inline=False)
     embed.add_field(name="Join Frequency", value=join_frequency.capitalize(), inline=False)
+    embed.add_field(name="Join Mode", value=server_config.get('join_mode', 'early').replace('_', ' ').capitalize(), inline=False)
+    ignored = [label for key, label in (("ignore_bots", "bots"), ("ignore_afk_channel", "AFK channel"), ("ignore_self_deafened", "self-deafened members")) if get_listener_filter(server_config)[key]]
+    embed.add_field(name="Listener Filter", value=f"Ignoring {', '.join(ignored)}" if ignored else "Counting everyone", inline=False)
     if join_frequency == 'timezones':
         timezones_list = '\n'.join(join_timezones) if join_timezones else "None"
         embed.add_field(name="Enabled Timezones", value=timezones_list, inline=False)
@@ -1831,16 +2956,19 @@ async def cheers(interaction: discord.Interaction, channel: discord.VoiceChannel
         await interaction.response.send_message("You do not have permission to use this command. Only bot administrators and developers can use /cheers.", ephemeral=True)
         return
 
+    session, status = await admit_voice_session(interaction.guild, "manual", interaction.user, channel, merge=True)
+    if status not in ("started", "reused"):
+        await interaction.response.send_message(describe_voice_admission(session, status), ephemeral=True)
+        return
     try:
         await interaction.response.defer(ephemeral=True)
-        if interaction.guild.voice_client and interaction.guild.voice_client.channel != channel:
-            await interaction.guild.voice_client.disconnect()
-
-        vc = interaction.guild.voice_client or await channel.connect()
+        if not await session.connect(channel):
+            await interaction.followup.send(f"Failed to join {channel.name}.", ephemeral=True)
+            return
         await interaction.followup.send(f"Joined {channel.name} successfully!", ephemeral=True)
-        await play_sound_and_leave(interaction.guild, vc, interaction.user, is_automatic=False)
-        await increment_manual_smoke_seshes_count()
+        await session.play_and_finish()
     except Exception as e:
+        await session.leave()
         await interaction.followup.send(f"Failed to join or play: {e}", ephemeral=True)
         print(f"Error during /cheers in {interaction.guild.name}: {e}")
 
@@ -1849,11 +2977,9 @@ async def meetthedev(interaction: discord.Interaction):
     if is_server_blacklisted(interaction.guild.id):
         await handle_blacklisted_server(interaction)
         return
-    with open(config_path, 'r') as f:
-        global_config = json.load(f)
-    
-    discord_link = global_config.get("discord_link", "https://discord.gg/HomiesHouse")
-    website = global_config.get("website", "https://HomiesHouse.net")
+    global_config = bot.global_config
+    discord_link = global_config.discord_link
+    website = global_config.website
     developer_ids = global_config.get("bot_developer_ids", [])
     owner_mentions = ', '.join([f"<@{owner_id}>" for owner_id in developer_ids])
     
@@ -1885,7 +3011,7 @@ async def blacklist(interaction: discord.Interaction, action: str, channel: disc
         if channel and channel.id not in blacklist_channels:
             blacklist_channels.append(channel.id)
             server_config["blacklist_channels"] = blacklist_channels
-            save_config(interaction.guild.id, server_config)
+            await save_config(interaction.guild.id, server_config)
             await interaction.response.send_message(f"Channel {channel.name} has been added to the blacklist.", ephemeral=True)
         else:
             await interaction.response.send_message(f"Channel {channel.name} is already in the blacklist or not specified.", ephemeral=True)
@@ -1893,7 +3019,7 @@ async def blacklist(interaction: discord.Interaction, action: str, channel: disc
         if channel and channel.id in blacklist_channels:
             blacklist_channels.remove(channel.id)
             server_config["blacklist_channels"] = blacklist_channels
-            save_config(interaction.guild.id, server_config)
+            await save_config(interaction.guild.id, server_config)
             await interaction.response.send_message(f"Channel {channel.name} has been removed from the blacklist.", ephemeral=True)
         else:
             await interaction.response.send_message(f"Channel {channel.name} is not in the blacklist or not specified.", ephemeral=True)
@@ -1941,10 +3067,9 @@ async def sync(ctx):
 
 @bot.event
 async def on_command_error(ctx, error):
-    with open(config_path, 'r') as f:
-        global_config = json.load(f)
+    global_config = bot.global_config
     developer_ids = global_config.get("bot_developer_ids", [])
-    discord_link = global_config.get("discord_link", "https://discord.gg/HomiesHouse")
+    discord_link = global_config.discord_link
     developer_mentions = ', '.join([f"<@{dev_id}>" for dev_id in developer_ids])
 
     embed = discord.Embed(
@@ -1973,24 +3098,30 @@ async def test(interaction: discord.Interaction):
     empty_list = []
 
     async def test_join_and_play(guild):
-        server_config = load_or_create_server_config(guild.id)
-        blacklist_channels = server_config.get("blacklist_channels", [])
-        
-        voice_channel = max(
-            (vc for vc in guild.voice_channels if len(vc.members) > 0 and vc.id not in blacklist_channels),
-            key=lambda vc: len(vc.members),
-            default=None
-        )
+        # An unjoinable but populated channel is still tried so it shows up as a failure, not as empty
+        voice_channel = voice_occupancy.best_channel(guild) or voice_occupancy.busiest_channel(guild)
         if voice_channel:
+            session, status = await admit_voice_session(guild, "test", interaction.user, voice_channel, merge=True)
+            if status == "merged":
+                success_list.append(guild)
+                return
+            if status not in ("started", "reused"):
+                failure_list.append(guild)
+                return
             try:
-                vc = await voice_channel.connect(reconnect=True)
+                if not await session.connect(voice_channel):
+                    failure_list.append(guild)
+                    return
                 await asyncio.sleep(15)
-                await play_sound_and_leave(guild, vc, interaction.user, is_automatic=False)
+                await session.play()
                 success_list.append(guild)
             except Exception as e:
                 print(f"Error during test join in {voice_channel.name} on {guild.name}: {e}")
                 failure_list.append(guild)
+            finally:
+                await session.finish()
         else:
+            blacklist_channels = voice_occupancy.blacklists.get(guild.id, set())
             if any(vc.id not in blacklist_channels for vc in guild.voice_channels):
                 empty_list.append(guild)
             else:
@@ -2189,14 +3320,10 @@ async def update(interaction: discord.Interaction, server_id: str = None):
         body_msg = await bot.wait_for('message', timeout=60.0, check=check_message)
         body = body_msg.content.strip()
 
-        # Load global config settings
-        with open(config_path, 'r') as f:
-            global_config = json.load(f)
-
-        log_settings = global_config.get("log_settings", {})
-        footer_text = log_settings.get("footer_text", "CheersBot V2.0 by HomiesHouse | Discord.gg/HomiesHouse")
-        footer_icon_url = log_settings.get("footer_icon_url", "https://i.imgur.com/4OO5wh0.png")
-        thumbnail_url = log_settings.get("thumbnail_url", "https://i.imgur.com/4OO5wh0.png")
+        # Global config settings
+        footer_text = bot.global_config.footer_text
+        footer_icon_url = bot.global_config.footer_icon_url
+        thumbnail_url = bot.global_config.thumbnail_url
 
         # Create the embed
         embed = discord.Embed(
@@ -2296,14 +3423,10 @@ class UpdateEmbedView(ui.View):
 FEEDBACK_BANS_PATH = os.path.join(SERVER_LOG_DIR, "FeedbackBans.json")
 
 def load_feedback_bans():
-    if os.path.exists(FEEDBACK_BANS_PATH):
-        with open(FEEDBACK_BANS_PATH, 'r') as f:
-            return json.load(f)
-    return {}
+    return state_writer.read_json(FEEDBACK_BANS_PATH, {})
 
 def save_feedback_bans(feedback_bans):
-    with open(FEEDBACK_BANS_PATH, 'w') as f:
-        json.dump(feedback_bans, f, indent=4)
+    state_writer.write_json(FEEDBACK_BANS_PATH, feedback_bans)
 
 @bot.tree.command(name="feedback-ban", description="Ban a user from using the /feedback command. Developer only.")
 @app_commands.describe(user="The user to ban from using /feedback.", reason="The reason for banning the user.")
@@ -2326,10 +3449,9 @@ async def partners(interaction: discord.Interaction):
     except json.JSONDecodeError:
         partners = []
     
-    with open(config_path, 'r') as f:
-        config = json.load(f)
+    config = bot.global_config
 
-    master_server_id = config['master_server_id']
+    master_server_id = config.master_server_id
     master_server_name = "⭐ Master Server"
     master_server_members = "Unknown"
 
@@ -2348,11 +3470,10 @@ async def partners(interaction: discord.Interaction):
         'members': master_server_members
     }
 
-    # Load global config settings for footer
-    log_settings = config.get("log_settings", {})
-    footer_text = log_settings.get("footer_text", "CheersBot V2.0 by HomiesHouse | Discord.gg/HomiesHouse")
-    footer_icon_url = log_settings.get("footer_icon_url", "https://i.imgur.com/4OO5wh0.png")
-    thumbnail_url = log_settings.get("thumbnail_url", "https://i.imgur.com/4OO5wh0.png")
+    # Global config settings for footer
+    footer_text = config.footer_text
+    footer_icon_url = config.footer_icon_url
+    thumbnail_url = config.thumbnail_url
 
     # Update member counts dynamically
     for partner in partners:
@@ -2451,10 +3572,7 @@ async def partners(interaction: discord.Interaction):
 @bot.command(name='partners_edit')
 async def partners_edit(ctx, action: str):
     """Edit the partners list. Action can be 'add' or 'remove'."""
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-
-    if str(ctx.author.id) not in config['bot_developer_ids']:
+    if str(ctx.author.id) not in bot.global_config.developer_ids:
         await ctx.send('You do not have permission to use this command.')
         return
 
@@ -2599,20 +3717,6 @@ async def partners_edit(ctx, action: str):
 
     await ctx.send('Partners list updated with current member counts.')
 
-CHEERS_COUNT_FILE = 'cheers-count.json'
-
-# Load cheers count data
-def load_cheers_count():
-    with open('cheers-count.json', 'r') as f:
-        return json.load(f)
-
-def save_cheers_count(data):
-    try:
-        with open('cheers-count.json', 'w') as f:
-            json.dump(data, f, indent=4)
-    except Exception as e:
-        print(f"Error saving cheers-count.json: {e}")
-
 class CheersCountView(View):
     def __init__(self, seshes_disabled=False, sounds_disabled=False, local_disabled=False):
         super().__init__(timeout=None)
@@ -2620,8 +3724,59 @@ class CheersCountView(View):
         self.add_item(Button(label="Specific Sounds", style=discord.ButtonStyle.primary, custom_id="specific_sounds_button", disabled=sounds_disabled))
         self.add_item(Button(label="Local", style=discord.ButtonStyle.primary, custom_id="local_button", disabled=local_disabled))
 
+CHEERS_COUNT_WINDOWS = {
+    "day": ("Last 24 Hours", timedelta(days=1)),
+    "week": ("Last 7 Days", timedelta(days=7)),
+    "month": ("Last 30 Days", timedelta(days=30))
+}
+
+async def build_windowed_cheers_count_embed(window):
+    label, length = CHEERS_COUNT_WINDOWS[window]
+    since = (datetime.now(timezone.utc) - length).timestamp()
+    by_trigger = await asyncio.to_thread(play_event_store.query_rollups, "trigger", since)
+    by_sound = await asyncio.to_thread(play_event_store.query_rollups, "sound", since, limit=5)
+    by_guild = await asyncio.to_thread(play_event_store.query_rollups, "guild_id", since, limit=5)
+    by_hour = await asyncio.to_thread(play_event_store.query_rollups, "hour", since, limit=1)
+
+    embed = discord.Embed(title=f"Seshes Count - {label}", color=discord.Color.green())
+    total_plays = sum(plays for _, plays, _ in by_trigger)
+    total_listeners = sum(listeners for _, _, listeners in by_trigger)
+    if not total_plays:
+        embed.description = "No cheers have been played in this window yet."
+        return embed
+
+    embed.add_field(name="Total Cheers", value=f"`{total_plays}` times", inline=True)
+    embed.add_field(name="Listeners Reached", value=f"`{total_listeners}`", inline=True)
+    embed.add_field(name="Cheers per Hour", value=f"`{total_plays / (length.total_seconds() / 3600):.2f}`", inline=True)
+    embed.add_field(name="By Trigger", value="\n".join(f"{trigger.title()}: `{plays}`" for trigger, plays, _ in by_trigger), inline=False)
+    embed.add_field(name="Top Sounds", value="\n".join(f"{sound}: `{plays}`" for sound, plays, _ in by_sound), inline=False)
+    embed.add_field(
+        name="Top Servers",
+        value="\n".join(
+            f"{bot.get_guild(guild_id).name if bot.get_guild(guild_id) else 'Unknown Server'}: `{plays}`"
+            for guild_id, plays, _ in by_guild
+        ),
+        inline=False
+    )
+    busiest_hour, busiest_plays, _ = by_hour[0]
+    embed.add_field(
+        name="Busiest Hour",
+        value=f"{datetime.fromtimestamp(busiest_hour, timezone.utc).strftime('%Y-%m-%d %H:00')} UTC (`{busiest_plays}` cheers)",
+        inline=False
+    )
+    return embed
+
 @bot.tree.command(name="cheers-count", description="Show the count of cheers across all servers.")
-async def cheers_count(interaction: discord.Interaction):
+@app_commands.describe(window="Only count cheers played in this time window.")
+@app_commands.choices(window=[
+    app_commands.Choice(name=label, value=window) for window, (label, _) in CHEERS_COUNT_WINDOWS.items()
+])
+async def cheers_count(interaction: discord.Interaction, window: str = None):
+    if window:
+        embed = await build_windowed_cheers_count_embed(window)
+        await interaction.response.send_message(embed=embed, view=CheersCountView())
+        return
+
     cheers_count = load_cheers_count()
     its_420_somewhere_count = cheers_count.get("its_420_somewhere_count", 0)
     manual_smoke_seshes_count = cheers_count.get("manual_smoke_seshes_count", 0)
@@ -2693,39 +3848,18 @@ async def on_interaction(interaction: discord.Interaction):
         view = CheersCountView(local_disabled=True)
         await interaction.response.edit_message(embed=embed, view=view)
 
-# Load developer DMs channel ID and role ID from config.json
-def load_developer_dm_channel_id():
-    with open(config_path, 'r') as f:
-        global_config = json.load(f)
-    return int(global_config.get("developer_dm_channel_id"))
-
-def load_developer_dm_role_id():
-    with open(config_path, 'r') as f:
-        global_config = json.load(f)
-    return int(global_config.get("developer_dm_role_id"))
-
-developer_dm_channel_id = load_developer_dm_channel_id()
-developer_dm_role_id = load_developer_dm_role_id()
-
 DM_BANS_PATH = os.path.join(SERVER_LOG_DIR, "DM_Bans.json")
 
 def load_dm_bans():
-    if os.path.exists(DM_BANS_PATH):
-        with open(DM_BANS_PATH, 'r') as f:
-            return json.load(f)
-    return {}
+    return state_writer.read_json(DM_BANS_PATH, {})
 
 def save_dm_bans(dm_bans):
-    with open(DM_BANS_PATH, 'w') as f:
-        json.dump(dm_bans, f, indent=4)
+    state_writer.write_json(DM_BANS_PATH, dm_bans)
 
 @bot.command(name='DM_ban', aliases=['dm_ban', 'Dm_ban', 'dM_ban'])
 async def dm_ban(ctx):
     """Ban a user from directly messaging the bot."""
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-
-    if str(ctx.author.id) not in config['bot_developer_ids']:
+    if str(ctx.author.id) not in bot.global_config.developer_ids:
         await ctx.send('You do not have permission to use this command.')
         return
 
@@ -2752,10 +3886,7 @@ async def dm_ban(ctx):
 @bot.command(name='DM_unban', aliases=['dm_unban', 'Dm_unban', 'dM_unban'])
 async def dm_unban(ctx):
     """Unban a user from directly messaging the bot."""
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-
-    if str(ctx.author.id) not in config['bot_developer_ids']:
+    if str(ctx.author.id) not in bot.global_config.developer_ids:
         await ctx.send('You do not have permission to use this command.')
         return
 
@@ -2780,22 +3911,15 @@ async def dm_unban(ctx):
 DM_GLOBAL_TOGGLE_PATH = os.path.join(SERVER_LOG_DIR, "DM_Global_Toggle.json")
 
 def load_dm_global_toggle():
-    if os.path.exists(DM_GLOBAL_TOGGLE_PATH):
-        with open(DM_GLOBAL_TOGGLE_PATH, 'r') as f:
-            return json.load(f)
-    return {"enabled": True, "reason": ""}
+    return state_writer.read_json(DM_GLOBAL_TOGGLE_PATH, {"enabled": True, "reason": ""})
 
 def save_dm_global_toggle(dm_global_toggle):
-    with open(DM_GLOBAL_TOGGLE_PATH, 'w') as f:
-        json.dump(dm_global_toggle, f, indent=4)
+    state_writer.write_json(DM_GLOBAL_TOGGLE_PATH, dm_global_toggle)
 
 @bot.command(name='DM_toggle', aliases=['dm_toggle', 'Dm_toggle', 'dM_toggle'])
 async def dm_toggle(ctx):
     """Toggle global DM enable/disable."""
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-
-    if str(ctx.author.id) not in config['bot_developer_ids']:
+    if str(ctx.author.id) not in bot.global_config.developer_ids:
         await ctx.send('You do not have permission to use this command.')
         return
 
@@ -2829,6 +3953,8 @@ async def dm_toggle(ctx):
 
 @bot.event
 async def on_message(message):
+    developer_dm_channel_id = bot.global_config.developer_dm_channel_id
+    developer_dm_role_id = bot.global_config.developer_dm_role_id
     if message.guild is None and not message.author.bot:
         dm_global_toggle = load_dm_global_toggle()
         if not dm_global_toggle["enabled"]:
@@ -2843,11 +3969,9 @@ async def on_message(message):
         dm_bans = load_dm_bans()
         if str(message.author.id) in dm_bans:
             reason = dm_bans[str(message.author.id)]
-            with open(config_path, 'r') as f:
-                global_config = json.load(f)
-            footer_text = global_config.get("log_settings", {}).get("footer_text", "CheersBot V2.0 by HomiesHouse | Discord.gg/HomiesHouse")
-            footer_icon_url = global_config.get("log_settings", {}).get("footer_icon_url", "https://i.imgur.com/4OO5wh0.png")
-            thumbnail_url = global_config.get("log_settings", {}).get("thumbnail_url", "https://i.imgur.com/4OO5wh0.png")
+            footer_text = bot.global_config.footer_text
+            footer_icon_url = bot.global_config.footer_icon_url
+            thumbnail_url = bot.global_config.thumbnail_url
 
             embed = discord.Embed(
                 title="DM Ban",
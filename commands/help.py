@@ -6,12 +6,14 @@ from datetime import datetime, timezone
 class HelpCog(commands.Cog):
     def __init__(self, bot, global_config):
         self.bot = bot
-        self.global_config = global_config
+
+    @property
+    def global_config(self):
+        return self.bot.global_config
 
     def is_developer(self, user_id):
         """Check if the user is a bot developer based on config.json."""
-        developer_ids = self.global_config.get("bot_developer_ids", [])
-        return str(user_id) in developer_ids
+        return str(user_id) in self.global_config.developer_ids
 
     def is_server_or_bot_admin(self, interaction):
         """Check if the user is a server admin or bot admin from server config."""
@@ -53,15 +55,19 @@ class HelpCog(commands.Cog):
                 {"name": "/cheers", "desc": "Play the cheers sound in a voice channel."},
                 {"name": "/blacklist", "desc": "Manage the blacklist of channels for auto-join."},
                 {"name": "/mode", "desc": "Change the bot's mode for this server (single or random)."},
+                {"name": "/join-mode", "desc": "Connect at X:15 or just before X:20."},
+                {"name": "/listener-filter", "desc": "Choose who counts as a listener when picking a voice channel."},
                 {"name": "/setup", "desc": "Set up the bot for this server (required before use)."},
                 {"name": "/sounds", "desc": "Manage sounds: set single sound or toggle random sounds."},
                 {"name": "/serverlist [enable/disable]", "desc": "Manage server list visibility (Bot Admins only)."}
             ],
             "developer": [
+                {"name": "/config-cache", "desc": "Show server config cache statistics."},
                 {"name": "/feedback-ban", "desc": "Ban a user from using the /feedback command."},
                 {"name": "/reload", "desc": "Reload and sync commands globally."},
                 {"name": "/test", "desc": "Manually trigger the join and play functions for all servers."},
-                {"name": "/update", "desc": "Send an update message to a specific server or all servers."}
+                {"name": "/update", "desc": "Send an update message to a specific server or all servers."},
+                {"name": "/voice-quarantine", "desc": "List or reset servers whose voice joins keep failing."}
             ],
             "text_developer": [
                 {"name": "c.DM_ban", "desc": "Ban a user from directly messaging the bot."},
@@ -5,13 +5,15 @@ from discord.ext import commands
 class PermissionsCog(commands.Cog):
     def __init__(self, bot, global_config):
         self.bot = bot
-        self.global_config = global_config
+
+    @property
+    def global_config(self):
+        return self.bot.global_config
 
     async def check_admin_or_developer(self, interaction: discord.Interaction) -> bool:
         """Check if the user is a bot admin or developer."""
         # Check if user is a developer
-        developer_ids = self.global_config.get("bot_developer_ids", [])
-        if str(interaction.user.id) in developer_ids:
+        if str(interaction.user.id) in self.global_config.developer_ids:
             print(f"User {interaction.user.id} is a developer.")
             return True
         
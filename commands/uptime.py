@@ -4,14 +4,18 @@ from discord.ext import commands
 from datetime import datetime, timezone
 import os
 import json
+import storage
 
 class UptimeCog(commands.Cog):
     def __init__(self, bot, global_config):
         self.bot = bot
-        self.global_config = global_config
         self.start_time = datetime.now(timezone.utc)  # Record the time when the cog is initialized
         self.config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
 
+    @property
+    def global_config(self):
+        return self.bot.global_config
+
     def load_longest_uptime(self):
         """Load the longest uptime from config.json."""
         return self.bot.global_config.get('longest_uptime_seconds', 0)
@@ -22,8 +26,8 @@ class UptimeCog(commands.Cog):
             config_data = json.load(f)
         
         config_data['longest_uptime_seconds'] = longest_uptime
-        with open(self.config_path, 'w') as f:
-            json.dump(config_data, f, indent=4)
+        # The config watcher may read config.json at any moment, so never leave it half-written
+        storage.atomic_write_text(self.config_path, json.dumps(config_data, indent=4))
         
         # Update the in-memory global_config to reflect the change
         self.bot.global_config['longest_uptime_seconds'] = longest_uptime
@@ -12,7 +12,6 @@ import asyncio
 class VotingCog(commands.Cog):
     def __init__(self, bot, global_config):
         self.bot = bot
-        self.global_config = global_config
         self.cheers_tokens_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'CheersTokens.json')
         self.server_list_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server_logs', 'CheersServerList.json')
         self.vote_tracking_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'VoteTracking.json')
@@ -35,6 +34,10 @@ class VotingCog(commands.Cog):
         self.bot.loop.create_task(self.cleanup_expired_servers())
         self.bot.loop.create_task(self.vote_reminder_task())
 
+    @property
+    def global_config(self):
+        return self.bot.global_config
+
     def init_database(self):
         """Initialize the SQLite database and create the voters table if it doesn't exist."""
         with sqlite3.connect(self.db_file) as conn:
@@ -82,16 +85,14 @@ class VotingCog(commands.Cog):
     def load_cheers_tokens(self):
         print(f"Loading From: {self.cheers_tokens_file}")
         try:
-            with open(self.cheers_tokens_file, 'r') as f:
-                return json.load(f)
+            return self.bot.state_writer.read_json(self.cheers_tokens_file)
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Error loading CheersTokens.json: {e}. Creating a new empty file.")
             self.load_or_create_cheers_tokens()
             return {}
 
     def save_cheers_tokens(self, data):
-        with open(self.cheers_tokens_file, 'w') as f:
-            json.dump(data, f, indent=4)
+        self.bot.state_writer.write_json(self.cheers_tokens_file, data)
 
     def load_or_create_server_list(self):
         server_logs_dir = os.path.dirname(self.server_list_file)
@@ -103,21 +104,19 @@ class VotingCog(commands.Cog):
 
     def load_server_list(self):
         try:
-            with open(self.server_list_file, 'r') as f:
-                data = json.load(f)
-                if "active_servers" not in data:
-                    data["active_servers"] = []
-                if "inactive_servers" not in data:
-                    data["inactive_servers"] = []
-                return data
+            data = self.bot.state_writer.read_json(self.server_list_file)
+            if "active_servers" not in data:
+                data["active_servers"] = []
+            if "inactive_servers" not in data:
+                data["inactive_servers"] = []
+            return data
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Error loading CheersServerList.json: {e}. Creating a new empty file.")
             self.load_or_create_server_list()
             return {"active_servers": [], "inactive_servers": []}
 
     def save_server_list(self, data):
-        with open(self.server_list_file, 'w') as f:
-            json.dump(data, f, indent=4)
+        self.bot.state_writer.write_json(self.server_list_file, data)
 
     def load_or_create_vote_tracking(self):
         if not os.path.exists(self.vote_tracking_file):
@@ -126,16 +125,14 @@ class VotingCog(commands.Cog):
 
     def load_vote_tracking(self):
         try:
-            with open(self.vote_tracking_file, 'r') as f:
-                return json.load(f)
+            return self.bot.state_writer.read_json(self.vote_tracking_file)
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Error loading VoteTracking.json: {e}. Creating a new empty file.")
             self.load_or_create_vote_tracking()
             return {}
 
     def save_vote_tracking(self, data):
-        with open(self.vote_tracking_file, 'w') as f:
-            json.dump(data, f, indent=4)
+        self.bot.state_writer.write_json(self.vote_tracking_file, data)
 
     def record_vote_intent(self, user_id, guild_id, channel_id, message_id):
         tracking = self.load_vote_tracking()
@@ -0,0 +1,450 @@
+# CheersBot v2 - Wall-clock job scheduler for the hourly waves.
+
+import time
+import zlib
+import heapq
+import asyncio
+import logging
+import pytz
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+
+# Longest single sleep before re-reading the wall clock, so clock corrections are picked up
+MAX_SLEEP_SECONDS = 60
+
+
+async def sleep_until(when):
+    """Sleep on the monotonic clock until the UTC datetime when."""
+    while True:
+        remaining = (when - datetime.now(timezone.utc)).total_seconds()
+        if remaining <= 0:
+            return
+        deadline = time.monotonic() + min(remaining, MAX_SLEEP_SECONDS)
+        await asyncio.sleep(max(0, deadline - time.monotonic()))
+
+
+def hourly_at(minute, second=0):
+    """Return a next_fire function for minute:second past every hour (UTC)."""
+    def next_fire(after):
+        candidate = after.replace(minute=minute, second=second, microsecond=0)
+        if candidate <= after:
+            candidate += timedelta(hours=1)
+        return candidate
+    return next_fire
+
+
+def every_minutes(interval):
+    """Return a next_fire function for every interval minutes, aligned to the top of the hour."""
+    def next_fire(after):
+        candidate = after.replace(second=0, microsecond=0)
+        candidate += timedelta(minutes=interval - candidate.minute % interval)
+        return candidate
+    return next_fire
+
+
+def next_local_time(zone, hour, minute, after):
+    """Return the first UTC instant after `after` at which the wall clock in zone reads hour:minute."""
+    tz = pytz.timezone(zone)
+    day = after.astimezone(tz).date()
+    for days in range(3):
+        date = day + timedelta(days=days)
+        candidate = tz.localize(datetime(date.year, date.month, date.day, hour, minute)).astimezone(timezone.utc)
+        if candidate > after:
+            return candidate
+
+
+class ScheduledJob:
+    def __init__(self, name, next_fire, callback, max_lateness, quiet):
+        self.name = name
+        self.next_fire = next_fire
+        self.callback = callback
+        self.max_lateness = max_lateness
+        self.quiet = quiet
+        self.next_slot = None
+        self.last_slot = None
+        self.last_lateness = None
+        self.fired = 0
+        self.skipped = 0
+
+
+class Scheduler:
+    """Runs coroutines at wall-clock instants without polling.
+
+    Each job sleeps on the monotonic clock until its next slot, fires
+    callback(slot) exactly once for that slot, and logs how late it started.
+    The next slot is computed from the previous one rather than from "now", so
+    loop lag never skips or repeats a slot; slots more than max_lateness
+    seconds in the past (e.g. after the process was suspended) are skipped,
+    and the job resumes from the next slot after the current time.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self.tasks = {}
+        self.running = set()
+
+    def add_job(self, name, next_fire, callback, max_lateness=60, quiet=False):
+        self.jobs[name] = ScheduledJob(name, next_fire, callback, max_lateness, quiet)
+        return self.jobs[name]
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        for name, job in self.jobs.items():
+            task = self.tasks.get(name)
+            if task is None or task.done():
+                self.tasks[name] = loop.create_task(self.run_job(job))
+
+    async def run_job(self, job):
+        job.next_slot = job.next_fire(datetime.now(timezone.utc))
+        while True:
+            await sleep_until(job.next_slot)
+            slot = job.next_slot
+            job.next_slot = job.next_fire(slot)
+            if job.last_slot is not None and slot <= job.last_slot:
+                continue
+            job.last_slot = slot
+            now = datetime.now(timezone.utc)
+            lateness = (now - slot).total_seconds()
+            job.last_lateness = lateness
+            if lateness > job.max_lateness:
+                job.skipped += 1
+                job.next_slot = job.next_fire(now)
+                logging.warning(f"Skipped {job.name} for {slot.strftime('%H:%M:%S')} UTC, {lateness:.1f}s late.")
+                continue
+            job.fired += 1
+            log = logging.debug if job.quiet else logging.info
+            log(f"Started {job.name} for {slot.strftime('%H:%M:%S')} UTC, {lateness * 1000:.0f}ms late.")
+            task = asyncio.get_running_loop().create_task(job.callback(slot))
+            self.running.add(task)
+            task.add_done_callback(lambda t, name=job.name: self.finish(name, t))
+
+    def finish(self, name, task):
+        self.running.discard(task)
+        if not task.cancelled() and task.exception():
+            logging.error(f"Scheduled job {name} failed: {task.exception()}")
+
+
+def spread_offset(key, window_seconds):
+    """Deterministic offset in [0, window_seconds) for key, the same on every run and restart."""
+    return zlib.crc32(str(key).encode()) / 2 ** 32 * window_seconds
+
+
+class ScheduleIndex:
+    """Guilds grouped by the instants their timezone waves fire.
+
+    Guilds are indexed by IANA zone, and a heap holds each zone's next fire
+    instant (lead before one of local_times in that zone, so DST is followed).
+    Every zone due at the same instant is fanned out in one callback(instant,
+    guild_ids) call. set_guild() updates a guild in place and wakes the runner,
+    so config changes apply without a restart; it does nothing if the guild's
+    zones are unchanged.
+    """
+
+    def __init__(self, local_times, lead, max_lateness=60):
+        self.local_times = local_times
+        self.lead = lead
+        self.max_lateness = max_lateness
+        self.zones = {}  # zone -> set of guild IDs
+        self.guild_zones = {}  # guild ID -> set of zones
+        self.heap = []  # (fire instant, zone)
+        self.scheduled = set()  # zones with an entry in the heap
+        self.changed = asyncio.Event()
+        self.task = None
+        self.running = set()
+
+    def next_fire(self, zone, after):
+        return min(next_local_time(zone, hour, minute, after + self.lead) for hour, minute in self.local_times) - self.lead
+
+    def set_guild(self, guild_id, zones):
+        zones = set(zones)
+        if zones == self.guild_zones.get(guild_id, set()):
+            return
+        for zone in self.guild_zones.pop(guild_id, set()) - zones:
+            self.zones[zone].discard(guild_id)
+            if not self.zones[zone]:
+                del self.zones[zone]
+        now = datetime.now(timezone.utc)
+        for zone in zones:
+            self.zones.setdefault(zone, set()).add(guild_id)
+            if zone not in self.scheduled:
+                heapq.heappush(self.heap, (self.next_fire(zone, now), zone))
+                self.scheduled.add(zone)
+        if zones:
+            self.guild_zones[guild_id] = zones
+        self.changed.set()
+
+    def remove_guild(self, guild_id):
+        self.set_guild(guild_id, [])
+
+    def due_between(self, start, end):
+        """Return {fire instant: guild IDs} for every instant after start and up to end."""
+        due = {}
+        for zone, guild_ids in self.zones.items():
+            instant = self.next_fire(zone, start)
+            while instant <= end:
+                due.setdefault(instant, set()).update(guild_ids)
+                instant = self.next_fire(zone, instant)
+        return due
+
+    def peek(self):
+        """Return the next fire instant that has guilds, dropping zones nobody uses any more."""
+        while self.heap and self.heap[0][1] not in self.zones:
+            _, zone = heapq.heappop(self.heap)
+            self.scheduled.discard(zone)
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, instant):
+        guild_ids = set()
+        while self.heap and self.heap[0][0] <= instant:
+            fired_at, zone = heapq.heappop(self.heap)
+            if zone not in self.zones:
+                self.scheduled.discard(zone)
+                continue
+            guild_ids |= self.zones[zone]
+            heapq.heappush(self.heap, (self.next_fire(zone, fired_at), zone))
+        return guild_ids
+
+    def start(self, callback):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run(callback))
+
+    async def run(self, callback):
+        while True:
+            instant = self.peek()
+            remaining = (instant - datetime.now(timezone.utc)).total_seconds() if instant else MAX_SLEEP_SECONDS
+            if instant is None or remaining > 0:
+                try:
+                    await asyncio.wait_for(self.changed.wait(), min(remaining, MAX_SLEEP_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+                self.changed.clear()
+                continue
+            guild_ids = self.pop_due(instant)
+            lateness = -remaining
+            if lateness > self.max_lateness:
+                logging.warning(f"Skipped timezone wave for {instant.strftime('%H:%M:%S')} UTC ({len(guild_ids)} server(s)), {lateness:.1f}s late.")
+                continue
+            logging.info(f"Started timezone wave for {instant.strftime('%H:%M:%S')} UTC ({len(guild_ids)} server(s)), {lateness * 1000:.0f}ms late.")
+            task = asyncio.get_running_loop().create_task(callback(instant, guild_ids))
+            self.running.add(task)
+            task.add_done_callback(self.finish)
+
+    def finish(self, task):
+        self.running.discard(task)
+        if not task.cancelled() and task.exception():
+            logging.error(f"Timezone wave failed: {task.exception()}")
+
+
+class TokenBucket:
+    """Allows rate acquisitions per second on average, with bursts of up to capacity."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ConnectLimiter:
+    """Process-wide limits on voice connects: a concurrency cap plus a token bucket per shard.
+
+    One instance is shared by every wave running at the same time, so waves
+    that overlap (the hourly and timezone waves, early and just-in-time
+    groups) together stay within the configured rate.
+    """
+
+    def __init__(self, max_concurrency, shard_rate, shard_burst):
+        self.max_concurrency = max_concurrency
+        self.shard_rate = shard_rate
+        self.shard_burst = shard_burst
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.buckets = {}
+
+    def settings(self):
+        return (self.max_concurrency, self.shard_rate, self.shard_burst)
+
+    def get_bucket(self, shard_id):
+        if shard_id not in self.buckets:
+            self.buckets[shard_id] = TokenBucket(self.shard_rate, self.shard_burst)
+        return self.buckets[shard_id]
+
+
+class LatencyTracker:
+    """Keeps the most recent connect durations (in seconds) and reports percentiles of them."""
+
+    def __init__(self, size=200):
+        self.samples = deque(maxlen=size)
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, percent):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class WaveJob:
+    """One guild's part of a wave: connect() under the executor's limits, then then(result) outside them."""
+
+    def __init__(self, key, shard_id, population, connect, then, not_before=None):
+        self.key = key
+        self.shard_id = shard_id
+        self.population = population
+        self.connect = connect
+        self.then = then
+        self.not_before = not_before
+        self.attempts = 0
+
+
+class WaveExecutor:
+    """Runs the connect step of a wave under a shared ConnectLimiter.
+
+    Jobs start in order of not_before (if set) and then voice population,
+    busiest first; a job is never started before its not_before. A connect that
+    raises one of the transient exception types is retried with exponential
+    backoff for as long as the retry can still start before the deadline.
+    Each job's then() continuation runs once its connect succeeds and does not
+    hold a concurrency slot. The second (relative to the wave's origin) in
+    which each connect attempt starts is counted in the histogram.
+    """
+
+    def __init__(self, limiter, transient=(), retry_delay=1.0, latency_tracker=None):
+        self.limiter = limiter
+        self.transient = transient
+        self.retry_delay = retry_delay
+        self.latency_tracker = latency_tracker
+        self.stats = {"jobs": 0, "connected": 0, "failed": 0, "retries": 0}
+        self.histogram = Counter()
+        self.origin = None
+
+    async def run(self, jobs, deadline, origin=None):
+        """Connect every job before the deadline (a UTC datetime) and wait for all continuations."""
+        self.origin = origin or datetime.now(timezone.utc)
+        queue = asyncio.Queue()
+        for job in sorted(jobs, key=lambda job: (job.not_before or self.origin, -job.population)):
+            queue.put_nowait(job)
+        self.stats["jobs"] += len(jobs)
+        continuations = []
+        workers = [
+            asyncio.create_task(self.worker(queue, deadline, continuations))
+            for _ in range(min(self.limiter.max_concurrency, len(jobs)))
+        ]
+        await asyncio.gather(*workers)
+        await asyncio.gather(*continuations, return_exceptions=True)
+
+    async def worker(self, queue, deadline, continuations):
+        while not queue.empty():
+            job = queue.get_nowait()
+            if job.not_before:
+                await sleep_until(job.not_before)
+            result = await self.connect(job, deadline)
+            if result is None:
+                self.stats["failed"] += 1
+                continue
+            self.stats["connected"] += 1
+            continuations.append(asyncio.create_task(job.then(result)))
+
+    async def connect(self, job, deadline):
+        delay = self.retry_delay
+        while True:
+            await self.limiter.get_bucket(job.shard_id).acquire()
+            try:
+                async with self.limiter.semaphore:
+                    job.attempts += 1
+                    self.histogram[int((datetime.now(timezone.utc) - self.origin).total_seconds())] += 1
+                    started = time.monotonic()
+                    result = await job.connect()
+                if result is not None and self.latency_tracker:
+                    self.latency_tracker.record(time.monotonic() - started)
+                return result
+            except self.transient as e:
+                remaining = (deadline - datetime.now(timezone.utc)).total_seconds()
+                if remaining <= delay:
+                    logging.error(f"Giving up on {job.key} after {job.attempts} attempt(s): {e}")
+                    return None
+                logging.warning(f"Retrying {job.key} in {delay:g}s after attempt {job.attempts} failed: {e}")
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    def histogram_summary(self):
+        """One-line summary of connect attempts per second, e.g. "peak 4/s at +37s over 12 seconds"."""
+        if not self.histogram:
+            return "no connects"
+        peak_second, peak = max(self.histogram.items(), key=lambda item: (item[1], -item[0]))
+        return (
+            f"peak {peak}/s at +{peak_second}s, {len(self.histogram)} distinct second(s) "
+            f"from +{min(self.histogram)}s to +{max(self.histogram)}s"
+        )
+
+
+class SynchronizedStart:
+    """Starts many callbacks back to back at one shared time.monotonic() deadline.
+
+    Each participant hands over its start callback ahead of time and a single
+    loop timer runs them all when the deadline arrives, so every guild starts
+    within the same loop iteration instead of each waking up on its own. How
+    late (in seconds) each callback actually ran is kept in skews by key.
+    """
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.pending = []
+        self.handle = None
+        self.skews = {}
+
+    @classmethod
+    def at(cls, when):
+        """Create one for the UTC datetime when, converted to the monotonic clock once."""
+        return cls(time.monotonic() + (when - datetime.now(timezone.utc)).total_seconds())
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+    async def start(self, key, callback):
+        """Run callback at the deadline (or right away if it has passed) and return its skew."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((key, callback, future))
+        if self.handle is None:
+            self.handle = loop.call_at(loop.time() + self.remaining(), self.fire)
+        return await future
+
+    def fire(self):
+        self.handle = None
+        pending, self.pending = self.pending, []
+        for key, callback, future in pending:
+            if future.cancelled():
+                continue
+            try:
+                callback()
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            skew = time.monotonic() - self.deadline
+            self.skews[key] = skew
+            future.set_result(skew)
+
+    def skew_summary(self):
+        """One-line summary of start skew, e.g. "p50 0.4ms, p99 3.1ms, max 3.5ms over 120 guild(s)"."""
+        if not self.skews:
+            return "nothing started"
+        ordered = sorted(self.skews.values())
+        def percentile(percent):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))] * 1000
+        return (
+            f"p50 {percentile(50):.1f}ms, p99 {percentile(99):.1f}ms, max {ordered[-1] * 1000:.1f}ms "
+            f"over {len(ordered)} guild(s)"
+        )
@@ -0,0 +1,278 @@
+# CheersBot v2 - Sound catalog for the cheers_sounds folder.
+
+import io
+import os
+import re
+import struct
+import asyncio
+import logging
+import discord
+from discord.oggparse import OggStream
+
+DURATION_PATTERN = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+CODEC_PATTERN = re.compile(r"Audio: (\w+)")
+VOLUME_PATTERN = re.compile(r"(mean|max)_volume: (-?[\d.]+|-inf) dB")
+
+# Frame files: magic, source size and mtime, then (uint16 length, Opus packet) pairs
+FRAMES_MAGIC = b"CBOPUS01"
+FRAMES_HEADER = struct.Struct("<8sqq")
+FRAME_LENGTH = struct.Struct("<H")
+
+
+class SoundCatalog:
+    """In-memory listing of the .mp3 files in the sound folder, with per-sound metadata.
+
+    The folder is scanned once and rescanned only when its mtime or one of
+    its sounds' size or mtime changes, or refresh() is called. Metadata (duration, size, codec, loudness) comes from
+    one ffmpeg volumedetect pass per file and is kept until the file changes.
+    If an OpusCache is given, each new or changed sound is also pre-encoded.
+    """
+
+    def __init__(self, sound_folder, ffmpeg_path, opus_cache=None):
+        self.sound_folder = sound_folder
+        self.ffmpeg_path = ffmpeg_path
+        self.opus_cache = opus_cache
+        self.sounds = {}  # filename -> metadata dict
+        self.folder_mtime = None
+        self.prepare_task = None
+
+    def names(self):
+        return list(self.sounds)
+
+    def get(self, name):
+        return self.sounds.get(name)
+
+    def refresh(self):
+        """Rescan the folder. Returns True if any sound was added, removed, or changed."""
+        self.folder_mtime = os.stat(self.sound_folder).st_mtime_ns
+        sounds = {}
+        for filename in sorted(os.listdir(self.sound_folder)):
+            if not filename.endswith('.mp3'):
+                continue
+            stat = os.stat(os.path.join(self.sound_folder, filename))
+            known = self.sounds.get(filename)
+            if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns:
+                sounds[filename] = known
+            else:
+                sounds[filename] = {
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime_ns,
+                    "duration": None,
+                    "codec": None,
+                    "mean_volume": None,
+                    "max_volume": None,
+                    "prepared": False
+                }
+        changed = sounds.keys() != self.sounds.keys() or any(sounds[name] is not self.sounds[name] for name in sounds)
+        self.sounds = sounds
+        if changed and self.opus_cache:
+            self.opus_cache.forget_stale(sounds)
+        return changed
+
+    def refresh_if_changed(self):
+        try:
+            mtime = os.stat(self.sound_folder).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self.folder_mtime and not self.any_sound_changed():
+            return False
+        return self.refresh()
+
+    def any_sound_changed(self):
+        # Overwriting a file in place doesn't touch the folder's mtime
+        for filename, info in self.sounds.items():
+            try:
+                stat = os.stat(os.path.join(self.sound_folder, filename))
+            except FileNotFoundError:
+                return True
+            if info["size"] != stat.st_size or info["mtime"] != stat.st_mtime_ns:
+                return True
+        return False
+
+    def schedule_prepare(self):
+        """Probe and pre-encode any new or changed sounds in the background."""
+        if self.prepare_task is None or self.prepare_task.done():
+            self.prepare_task = asyncio.get_running_loop().create_task(self.prepare_pending())
+
+    async def prepare_pending(self):
+        # refresh() can swap in new entries while this runs, so keep going until none are left
+        while True:
+            pending = [(filename, info) for filename, info in self.sounds.items() if not info["prepared"]]
+            if not pending:
+                return
+            for filename, info in pending:
+                if self.sounds.get(filename) is not info:
+                    continue  # Removed or replaced since; its new entry is picked up next pass
+                info.update(await self.probe(filename))
+                if self.opus_cache and self.sounds.get(filename) is info:
+                    await self.opus_cache.ensure(filename, info)
+                info["prepared"] = True
+
+    async def probe(self, filename):
+        """Run ffmpeg's volumedetect filter over a sound and parse its duration, codec, and loudness."""
+        metadata = {}
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self.ffmpeg_path, "-hide_banner", "-nostats", "-i", os.path.join(self.sound_folder, filename),
+                "-af", "volumedetect", "-f", "null", "-",
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+        except OSError as e:
+            logging.error(f"Could not probe sound {filename}: {e}")
+            return metadata
+        output = stderr.decode(errors="replace")
+        duration = DURATION_PATTERN.search(output)
+        if duration:
+            hours, minutes, seconds = duration.groups()
+            metadata["duration"] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        codec = CODEC_PATTERN.search(output)
+        if codec:
+            metadata["codec"] = codec.group(1)
+        for kind, value in VOLUME_PATTERN.findall(output):
+            metadata[f"{kind}_volume"] = float(value)
+        return metadata
+
+
+class OpusCache:
+    """Sounds transcoded once to 48 kHz stereo Opus, stored as length-prefixed packet files.
+
+    Each encoded sound is loaded into a SharedFrameBuffer that playback
+    streams from, so no ffmpeg process is spawned and discord.py does not
+    re-encode anything per guild.
+    """
+
+    def __init__(self, cache_dir, sound_folder, ffmpeg_path, bitrate=128):
+        self.cache_dir = cache_dir
+        self.sound_folder = sound_folder
+        self.ffmpeg_path = ffmpeg_path
+        self.bitrate = bitrate
+        self.buffers = {}  # sound filename -> SharedFrameBuffer
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def get_frames_path(self, filename):
+        return os.path.join(self.cache_dir, f"{os.path.splitext(filename)[0]}.frames")
+
+    def get(self, filename):
+        """Return the frame buffer for a sound, or None if it hasn't been encoded yet."""
+        return self.buffers.get(filename)
+
+    def is_current(self, path, info):
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(FRAMES_HEADER.size)
+        except FileNotFoundError:
+            return False
+        if len(header) != FRAMES_HEADER.size:
+            return False
+        return FRAMES_HEADER.unpack(header) == (FRAMES_MAGIC, info["size"], info["mtime"])
+
+    def source_matches(self, filename, info):
+        try:
+            stat = os.stat(os.path.join(self.sound_folder, filename))
+        except FileNotFoundError:
+            return False
+        return stat.st_size == info["size"] and stat.st_mtime_ns == info["mtime"]
+
+    async def ensure(self, filename, info):
+        """Encode a sound unless an up-to-date frames file already exists."""
+        path = self.get_frames_path(filename)
+        self.buffers.pop(filename, None)
+        if not await asyncio.to_thread(self.is_current, path, info):
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    self.ffmpeg_path, "-hide_banner", "-loglevel", "error",
+                    "-i", os.path.join(self.sound_folder, filename),
+                    "-map_metadata", "-1", "-f", "opus", "-c:a", "libopus",
+                    "-ar", "48000", "-ac", "2", "-b:a", f"{self.bitrate}k", "-frame_duration", "20",
+                    "pipe:1",
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                stdout, stderr = await process.communicate()
+            except OSError as e:
+                logging.error(f"Could not encode sound {filename} to Opus: {e}")
+                return
+            if process.returncode != 0:
+                logging.error(f"FFmpeg failed to encode {filename} to Opus: {stderr.decode(errors='replace').strip()}")
+                return
+            if not await asyncio.to_thread(self.source_matches, filename, info):
+                # The sound changed while it was encoding; don't stamp new audio with the old size and mtime
+                return
+            await asyncio.to_thread(self.write_frames, path, info, stdout)
+        self.buffers[filename] = await asyncio.to_thread(SharedFrameBuffer, path)
+
+    def write_frames(self, path, info, ogg_data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(FRAMES_HEADER.pack(FRAMES_MAGIC, info["size"], info["mtime"]))
+            for packet in OggStream(io.BytesIO(ogg_data)).iter_packets():
+                # The Ogg stream starts with the OpusHead/OpusTags header packets, which aren't audio
+                if packet.startswith((b"OpusHead", b"OpusTags")):
+                    continue
+                f.write(FRAME_LENGTH.pack(len(packet)))
+                f.write(packet)
+        os.replace(tmp_path, path)
+
+    def forget_stale(self, sounds):
+        """Stop serving sounds that were removed from the catalog or changed since they were encoded."""
+        for filename in list(self.buffers):
+            if filename in sounds and sounds[filename]["prepared"]:
+                continue
+            del self.buffers[filename]
+            if filename not in sounds:
+                try:
+                    os.remove(self.get_frames_path(filename))
+                except FileNotFoundError:
+                    pass
+
+
+class SharedFrameBuffer:
+    """One immutable in-memory copy of a sound's Opus packets, shared by every guild playing it.
+
+    The frames file is read once into a single bytes object and indexed with
+    memoryview slices, so the audio is held in memory once no matter how many
+    guilds play it. Each packet is still copied when it is read for sending.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        view = memoryview(self.data)
+        frames = []
+        offset = FRAMES_HEADER.size
+        while offset + FRAME_LENGTH.size <= len(self.data):
+            (length,) = FRAME_LENGTH.unpack_from(self.data, offset)
+            offset += FRAME_LENGTH.size
+            frames.append(view[offset:offset + length])
+            offset += length
+        self.frames = tuple(frames)
+
+    @property
+    def duration(self):
+        return len(self.frames) * 0.02
+
+
+class FrameCursor(discord.AudioSource):
+    """Per-voice-client read position over a SharedFrameBuffer, one 20 ms packet per read()."""
+
+    def __init__(self, buffer):
+        self.frames = buffer.frames
+        self.position = 0
+
+    @property
+    def duration(self):
+        return len(self.frames) * 0.02
+
+    def read(self):
+        if self.position >= len(self.frames):
+            return b''
+        frame = self.frames[self.position]
+        self.position += 1
+        # The voice client may hand the packet to the DAVE encryptor, which is only guaranteed to accept bytes
+        return bytes(frame)
+
+    def is_opus(self):
+        return True
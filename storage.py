@@ -0,0 +1,455 @@
+# CheersBot v2 - Storage backends for per-guild state.
+
+import os
+import json
+import asyncio
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime, timezone
+
+# Columns that are copied out of the config dict so they can be queried with an index
+INDEXED_COLUMNS = ("mode", "join_frequency", "log_channel_id")
+
+
+class JsonConfigStorage:
+    """One config_<guild_id>.json file per guild inside the configs directory."""
+
+    name = "json"
+
+    def __init__(self, config_dir):
+        self.config_dir = config_dir
+        if not os.path.exists(self.config_dir):
+            os.makedirs(self.config_dir)
+
+    def get_filepath(self, guild_id):
+        return os.path.join(self.config_dir, f"config_{guild_id}.json")
+
+    def version(self, guild_id):
+        """Return a token that changes whenever the guild's config changes on disk."""
+        try:
+            return os.stat(self.get_filepath(guild_id)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def exists(self, guild_id):
+        return os.path.exists(self.get_filepath(guild_id))
+
+    def load(self, guild_id):
+        config_file = self.get_filepath(guild_id)
+        if not os.path.exists(config_file):
+            return None
+        with open(config_file, 'r') as f:
+            return json.load(f)
+
+    def save(self, guild_id, config_data):
+        atomic_write_text(self.get_filepath(guild_id), json.dumps(config_data, indent=4))
+
+    def delete(self, guild_id):
+        config_file = self.get_filepath(guild_id)
+        if os.path.exists(config_file):
+            os.remove(config_file)
+            return True
+        return False
+
+    def guild_ids(self):
+        return [
+            filename[len("config_"):-len(".json")]
+            for filename in os.listdir(self.config_dir)
+            if filename.startswith("config_") and filename.endswith(".json")
+        ]
+
+    def find_guild_ids(self, **filters):
+        """Return the IDs of guilds whose config matches every key/value in filters."""
+        matches = []
+        for guild_id in self.guild_ids():
+            try:
+                config = self.load(guild_id) or {}
+            except (OSError, json.JSONDecodeError) as e:
+                logging.error(f"Error reading config for guild {guild_id}: {e}")
+                continue
+            if all(config.get(key) == value for key, value in filters.items()):
+                matches.append(guild_id)
+        return matches
+
+    def close(self):
+        pass
+
+
+class SQLiteConfigStorage:
+    """All guild configs in a single WAL-mode SQLite database, one row per guild."""
+
+    name = "sqlite"
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.init_database()
+
+    def init_database(self):
+        """Create the guild_configs table and its indexes if they don't exist."""
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS guild_configs (
+                    guild_id TEXT PRIMARY KEY,
+                    mode TEXT,
+                    join_frequency TEXT,
+                    log_channel_id INTEGER,
+                    config TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            for column in INDEXED_COLUMNS:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_guild_configs_{column} ON guild_configs ({column})")
+            self.conn.commit()
+
+    def version(self, guild_id):
+        """Return a token that changes whenever another connection commits to the database.
+
+        Writes made through this connection do not change it, so cached configs
+        are only invalidated by external edits (another process or the migration tool).
+        """
+        with self.lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def exists(self, guild_id):
+        with self.lock:
+            row = self.conn.execute("SELECT 1 FROM guild_configs WHERE guild_id = ?", (str(guild_id),)).fetchone()
+        return row is not None
+
+    def load(self, guild_id):
+        with self.lock:
+            row = self.conn.execute("SELECT config FROM guild_configs WHERE guild_id = ?", (str(guild_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, guild_id, config_data):
+        self.save_many([(guild_id, config_data)])
+
+    def save_many(self, items):
+        """Upsert several (guild_id, config) pairs in a single transaction."""
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (
+                str(guild_id),
+                config_data.get("mode"),
+                config_data.get("join_frequency"),
+                config_data.get("log_channel_id"),
+                json.dumps(config_data),
+                now
+            )
+            for guild_id, config_data in items
+        ]
+        with self.lock:
+            with self.conn:
+                self.conn.executemany("""
+                    INSERT INTO guild_configs (guild_id, mode, join_frequency, log_channel_id, config, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(guild_id) DO UPDATE SET
+                        mode = excluded.mode,
+                        join_frequency = excluded.join_frequency,
+                        log_channel_id = excluded.log_channel_id,
+                        config = excluded.config,
+                        updated_at = excluded.updated_at
+                """, rows)
+
+    def delete(self, guild_id):
+        with self.lock:
+            with self.conn:
+                cursor = self.conn.execute("DELETE FROM guild_configs WHERE guild_id = ?", (str(guild_id),))
+        return cursor.rowcount > 0
+
+    def guild_ids(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT guild_id FROM guild_configs")]
+
+    def find_guild_ids(self, **filters):
+        """Return the IDs of guilds whose indexed columns match every key/value in filters."""
+        unknown = set(filters) - set(INDEXED_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot filter on non-indexed config keys: {', '.join(sorted(unknown))}")
+        clauses = " AND ".join(f"{column} = ?" for column in filters) or "1"
+        with self.lock:
+            rows = self.conn.execute(f"SELECT guild_id FROM guild_configs WHERE {clauses}", tuple(filters.values()))
+            return [row[0] for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class PlayEventStore:
+    """Append-only log of completed playbacks with hourly rollups, in its own SQLite database.
+
+    Raw events are kept for a retention window and then compacted away; the
+    play_rollups table is updated in the same transaction as each insert, so
+    windowed stats never need to scan play_events.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.init_database()
+
+    def init_database(self):
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS play_events (
+                    id INTEGER PRIMARY KEY,
+                    guild_id INTEGER NOT NULL,
+                    channel_id INTEGER,
+                    sound TEXT NOT NULL,
+                    trigger TEXT NOT NULL,
+                    listeners INTEGER NOT NULL,
+                    started_at REAL NOT NULL,
+                    finished_at REAL NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_play_events_started_at ON play_events (started_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_play_events_guild_id ON play_events (guild_id, started_at)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS play_rollups (
+                    hour INTEGER NOT NULL,
+                    guild_id INTEGER NOT NULL,
+                    sound TEXT NOT NULL,
+                    trigger TEXT NOT NULL,
+                    plays INTEGER NOT NULL,
+                    listeners INTEGER NOT NULL,
+                    PRIMARY KEY (hour, guild_id, sound, trigger)
+                )
+            """)
+            self.conn.commit()
+
+    def record_many(self, events):
+        """Insert a batch of event dicts and fold them into the hourly rollups in one transaction."""
+        if not events:
+            return
+        rows = [
+            (event["guild_id"], event["channel_id"], event["sound"], event["trigger"],
+             event["listeners"], event["started_at"], event["finished_at"])
+            for event in events
+        ]
+        rollups = [
+            (int(event["started_at"]) // 3600 * 3600, event["guild_id"], event["sound"], event["trigger"], event["listeners"])
+            for event in events
+        ]
+        with self.lock:
+            with self.conn:
+                self.conn.executemany("""
+                    INSERT INTO play_events (guild_id, channel_id, sound, trigger, listeners, started_at, finished_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                self.conn.executemany("""
+                    INSERT INTO play_rollups (hour, guild_id, sound, trigger, plays, listeners)
+                    VALUES (?, ?, ?, ?, 1, ?)
+                    ON CONFLICT(hour, guild_id, sound, trigger) DO UPDATE SET
+                        plays = plays + 1,
+                        listeners = listeners + excluded.listeners
+                """, rollups)
+
+    def compact(self, retention_days):
+        """Delete raw events older than retention_days. Rollups are kept. Returns the number deleted."""
+        cutoff = datetime.now(timezone.utc).timestamp() - retention_days * 86400
+        with self.lock:
+            with self.conn:
+                cursor = self.conn.execute("DELETE FROM play_events WHERE started_at < ?", (cutoff,))
+        return cursor.rowcount
+
+    def query_rollups(self, group_by, since, guild_id=None, limit=None):
+        """Sum plays and listeners from the rollups since a unix timestamp, grouped by one column.
+
+        Returns (key, plays, listeners) tuples ordered by plays, highest first.
+        """
+        if group_by not in ("hour", "guild_id", "sound", "trigger"):
+            raise ValueError(f"Cannot group play rollups by {group_by}")
+        query = f"SELECT {group_by}, SUM(plays), SUM(listeners) FROM play_rollups WHERE hour >= ?"
+        params = [int(since) // 3600 * 3600]
+        if guild_id is not None:
+            query += " AND guild_id = ?"
+            params.append(guild_id)
+        query += f" GROUP BY {group_by} ORDER BY SUM(plays) DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self.lock:
+            return self.conn.execute(query, params).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def atomic_write_text(path, text):
+    """Write text to path via a temp file and os.replace so readers never see a torn file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class StateWriter:
+    """Debounced write-behind flusher for bot state.
+
+    Callers mark state dirty with schedule() or write_json(). Repeated writes to the
+    same key between flushes collapse into one, and each flush serializes on the
+    event loop (so the data can't change mid-dump) and writes in a worker thread.
+    Data stays readable through read_json() until its write has finished, and a
+    failed write is queued again unless newer data has been scheduled since.
+    """
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self.pending = {}  # key -> (data, serialize, write, on_written)
+        self.inflight = {}  # key -> entry taken from pending whose write hasn't finished yet
+        self.flush_lock = None
+        self.task = None
+        self.stats = {"scheduled": 0, "coalesced": 0, "flushes": 0, "writes": 0, "errors": 0}
+
+    def schedule(self, key, data, serialize, write, on_written=None):
+        """Mark key dirty. serialize(data) runs on the loop at flush time, write(payload) in a thread."""
+        self.stats["scheduled"] += 1
+        if key in self.pending:
+            self.stats["coalesced"] += 1
+        self.pending[key] = (data, serialize, write, on_written)
+
+    def write_json(self, path, data, indent=4):
+        self.schedule(path, data, lambda d: json.dumps(d, indent=indent), lambda text: atomic_write_text(path, text))
+
+    def read_json(self, path, default=FileNotFoundError):
+        """Return the not-yet-flushed data for path if there is any, otherwise read it from disk."""
+        entry = self.pending.get(path) or self.inflight.get(path)
+        if entry:
+            return entry[0]
+        if default is not FileNotFoundError and not os.path.exists(path):
+            return default
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def is_pending(self, key):
+        return key in self.pending or key in self.inflight
+
+    def discard(self, key):
+        self.pending.pop(key, None)
+        self.inflight.pop(key, None)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.flush_lock = asyncio.Lock()
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def take_jobs(self):
+        jobs = []
+        pending, self.pending = self.pending, {}
+        for key, entry in pending.items():
+            data, serialize, write, on_written = entry
+            try:
+                payload = serialize(data)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.error(f"Error serializing state for {key}: {e}")
+                continue
+            self.inflight[key] = entry
+            jobs.append((key, entry, payload))
+        return jobs
+
+    def write_jobs(self, jobs):
+        results = []
+        for key, entry, payload in jobs:
+            try:
+                results.append((key, entry, True, entry[2](payload)))
+                self.stats["writes"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.error(f"Error writing state for {key}: {e}")
+                results.append((key, entry, False, None))
+        return results
+
+    def finish_jobs(self, results):
+        for key, entry, written, result in results:
+            if self.inflight.get(key) is not entry:
+                continue  # Discarded while it was being written
+            del self.inflight[key]
+            if not written:
+                # Retry on the next flush, unless newer data has been scheduled since
+                self.pending.setdefault(key, entry)
+            elif entry[3]:
+                entry[3](result)
+
+    async def flush(self):
+        """Write every dirty key in a worker thread. Safe to call at any time."""
+        if not self.pending:
+            return
+        async with self.flush_lock:
+            jobs = self.take_jobs()
+            results = await asyncio.to_thread(self.write_jobs, jobs)
+            self.stats["flushes"] += 1
+            self.finish_jobs(results)
+
+    def flush_sync(self):
+        """Write every dirty key on the calling thread. Used on shutdown."""
+        if not self.pending:
+            return
+        self.finish_jobs(self.write_jobs(self.take_jobs()))
+        self.stats["flushes"] += 1
+
+
+def create_config_storage(backend, config_dir, db_file):
+    """Build the config storage backend named in config.json ("sqlite" or "json")."""
+    if backend == "json":
+        return JsonConfigStorage(config_dir)
+    if backend == "sqlite":
+        return SQLiteConfigStorage(db_file)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def migrate_json_configs(config_dir, target, overwrite=False):
+    """Import every config_<guild_id>.json file in config_dir into the target storage.
+
+    Returns the number of configs imported. Existing rows are kept unless overwrite is set.
+    """
+    source = JsonConfigStorage(config_dir)
+    items = []
+    for guild_id in source.guild_ids():
+        if not overwrite and target.exists(guild_id):
+            continue
+        try:
+            config_data = source.load(guild_id)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.error(f"Skipping unreadable config for guild {guild_id}: {e}")
+            continue
+        if config_data is not None:
+            items.append((guild_id, config_data))
+    if hasattr(target, "save_many"):
+        target.save_many(items)
+    else:
+        for guild_id, config_data in items:
+            target.save(guild_id, config_data)
+    return len(items)
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Import configs/config_<guild_id>.json files into the SQLite state database.")
+    parser.add_argument("--config-dir", default=os.path.join(base_dir, "configs"), help="Directory holding the JSON config files.")
+    parser.add_argument("--db", default=os.path.join(base_dir, "cheersbot.db"), help="Path of the SQLite database to import into.")
+    parser.add_argument("--overwrite", action="store_true", help="Replace configs that already exist in the database.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    storage = SQLiteConfigStorage(args.db)
+    imported = migrate_json_configs(args.config_dir, storage, overwrite=args.overwrite)
+    storage.close()
+    logging.info(f"Imported {imported} server config(s) from {args.config_dir} into {args.db}")